@@ -1,4 +1,6 @@
 import os, io
+from time import perf_counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import numpy as np
 from datetime import *
 import getpass
@@ -10,275 +12,781 @@ import matplotlib.pyplot as plt
 
 from pyevtk.hl import pointsToVTK
 import vtk
-from vtk.util.numpy_support import numpy_to_vtk
-
-# import pkg_resources  # part of setuptools
-# version = pkg_resources.require("ReGrid")[0].version
+from vtk.util.numpy_support import get_vtk_to_numpy_typemap, numpy_to_vtk, numpy_to_vtkIdTypeArray, vtk_to_numpy
+
+from regrid.flowgrid.cmgdat import DatFile, keywordName
+from regrid.flowgrid.cmgout import OutputIndex, normalizeTitle, parseTable
+from regrid.flowgrid.eclascii import KeywordFile, writeRepeats, writeValues
+from regrid.flowgrid.eclbinary import readBinaryKeywords, readRecords, writeRecord
+from regrid.flowgrid.h5store import GridStore, writeStore
+from regrid.flowgrid.rectilinear import TOLERANCE, layerAxis, rectilinearAxes
+from regrid.flowgrid.repeat import roundSignificant
+from regrid.flowgrid.volume import cellVolumes, pillarPoints
+
+try:
+    from importlib.metadata import version as packageVersion
+    version = packageVersion("ReGrid")
+except Exception:
+    version = "unknown"
 
 f2m = 0.3048  # ft to m
+ID_TYPE = get_vtk_to_numpy_typemap()[vtk.VTK_ID_TYPE]  # numpy type of vtkIdType
+
+# Active cell flags, ACTNUM values are small non-negative integers
+MASK_TYPE = np.uint8
+
+# Grid types with i, j, k topology, rectilinear grids and image data only store their axes
+STRUCTURED = ("vtkStructuredGrid", "vtkRectilinearGrid", "vtkImageData")
+
+
+def axesPoints(X, Y, Z):
+    """ Points of the grid spanned by three axis vectors, (nz, ny, nx, 3) with x fastest
+    """
+    points = np.empty((len(Z), len(Y), len(X), 3))
+    points[..., 0] = X[None, None, :]
+    points[..., 1] = Y[None, :, None]
+    points[..., 2] = Z[:, None, None]
+    return points
+
+
+def wrapArray(array):
+    """ A new VTK array, of the same type and name, on the memory of array
+    """
+    wrapped = numpy_to_vtk(vtk_to_numpy(array), deep=False, array_type=array.GetDataType())
+    wrapped.SetName(array.GetName())
+    return wrapped
+
+
+def cornerZcorn(depths):
+    """ ZCORN as (nz, 2, nn, 2, ne, 2) from the (ne, nn, nz, 8) corner depths of
+        GRDECL.CornerDepths, a view
+    """
+    ne, nn, nz = depths.shape[0:3]
+    return np.reshape(depths, (ne, nn, nz, 2, 2, 2)).transpose(2, 3, 1, 4, 0, 5)
+
+
+def castValues(values, dtype, count):
+    """ Keyword values, N*value repeats expanded as they were read, as an array of
+        dtype. A ValueError is raised if there are not count of them.
+    """
+    data = np.asarray(values).astype(dtype, copy=False)
+    if len(data) != count:
+        raise ValueError("expected %i values, got %i" % (count, len(data)))
+    return data
 
 
 class FlowGrid(object):
     def __init__(self):
         self.skip = 0
         self.Prop = {}
+        # optional GridCache, loaders then keep their parsed arrays in it
+        self.cache = None
+        # None for grids without inactive cells, see activeMask
+        self.ActiveCells = None
+        # precision policy, see setPrecision
+        self.propertyType = np.float64
+        self.pointType = np.float64
+        self.Origin = np.zeros(3)
+        # cell index maps of active-cells-only grids, see keepActiveCells
+        self.GlobalIndex = None
+        self.ActiveIndex = None
 
     def __getitem__(self, key):
         return getattr(self, key)
 
+    def setPrecision(self, properties=np.float32, points=np.float32):
+        """ Precision policy for the grids and properties loaded afterwards, the default
+            is float64 for both, without arguments the compact float32 mode.
+            properties = dtype of float cell and point arrays
+            points = dtype of the point coordinates. float32 coordinates are stored
+                     relative to Origin (float64, the lowest corner of the grid), so
+                     map coordinates keep their precision. gridPoints and the exporters
+                     add Origin back. GRDECL corner depths are held in this precision
+                     too, and ZCORN as read is then dropped.
+            Active cells are always held as MASK_TYPE (uint8).
+        """
+        self.propertyType = np.dtype(properties).type
+        self.pointType = np.dtype(points).type
+
+    def castProperty(self, data):
+        """ Float values in the precision of the policy, other arrays as they are
+        """
+        data = np.asarray(data)
+        if data.dtype.kind == "f" and data.dtype != self.propertyType:
+            data = data.astype(self.propertyType)
+        return data
+
+    def cellValues(self, data, shape=None):
+        """ Cell values as the model holds them, in the precision of the policy. For
+            active-cells-only grids (see keepActiveCells) that is the values of the
+            active cells, flat in active order, values given for the whole grid are
+            reduced to them. Otherwise the values are reshaped to shape (Fortran
+            order) if it is given.
+        """
+        data = self.castProperty(data)
+        if self.GlobalIndex is not None:
+            if data.size == len(self.ActiveIndex):
+                data = np.ravel(data, order="F")[self.GlobalIndex]
+            return data
+        if shape is not None:
+            data = np.reshape(data, shape, order="F")
+        return data
+
+    def activeMask(self):
+        """ ActiveCells flat in VTK (Fortran) order, generated as all ones for grids
+            that have no inactive cells
+        """
+        if self.ActiveCells is None:
+            return np.ones(self.Grid.GetNumberOfCells(), dtype=MASK_TYPE)
+        return np.ravel(self.ActiveCells, order="F")
+
+    def memoryReport(self, show=True):
+        """ Bytes held by the arrays of the model, the numpy attributes, the properties
+            in Prop and the arrays of the VTK grid. Arrays sharing memory, e.g. numpy
+            arrays wrapped by VTK or views, are counted once in the total.
+            show = print the report
+            returns (rows, total), rows of (name, dtype, bytes)
+        """
+        arrays = [(name, value) for name, value in sorted(vars(self).items()) if isinstance(value, np.ndarray)]
+        arrays += [("Prop[%s]" % name, np.asarray(value)) for name, value in sorted(self.Prop.items())]
+        if hasattr(self, "Grid"):
+            for name, value in self.gridArrays().items():
+                if isinstance(value, np.ndarray):
+                    arrays.append(("vtk:" + name, value))
+        rows = []
+        counted = []
+        total = 0
+        for name, value in arrays:
+            rows.append((name, value.dtype.name, value.nbytes))
+            if not any(np.may_share_memory(value, other) for other in counted):
+                counted.append(value)
+                total += value.nbytes
+        if show:
+            for name, dtype, nbytes in rows:
+                print("%-40s %-8s %14i" % (name, dtype, nbytes))
+            print("%-40s %-8s %14i" % ("Total", "", total))
+        return rows, total
+
+    def requireStructured(self, fmt):
+        """ Raises a ValueError for grids without i, j, k topology, e.g. the
+            unstructured grids of keepActiveCells, that fmt files cannot hold
+        """
+        if self.GridType not in STRUCTURED:
+            raise ValueError("A structured grid is required for %s export, the grid is a %s" % (fmt, self.GridType))
+
+    def gridDimensions(self):
+        """ Point dimensions of the structured grid, works across VTK versions
+        """
+        dims = [0, 0, 0]
+        self.Grid.GetDimensions(dims)
+        return np.array(dims)
+
+    def buildPoints(self, points, relative=False):
+        """ Wraps an (N, 3) coordinate array as vtkPoints in one call.
+            C-contiguous float32 or float64 arrays are shared with VTK without a copy,
+            anything else is converted once first.
+            With float32 points (see setPrecision) Origin is set to the lowest corner
+            and the points are stored relative to it, unless relative is True, the
+            points are then already relative to Origin.
+        """
+        points = np.reshape(np.asarray(points), (-1, 3))
+        if self.pointType == np.float64 and not relative:
+            self.Origin = np.zeros(3)
+            if points.dtype != np.float32 and points.dtype != np.float64:
+                points = points.astype(float)
+        elif not relative:
+            self.Origin = np.floor(np.min(points, axis=0)) if len(points) else np.zeros(3)
+            # subtracted in float64 and rounded into the output, without a float64 temporary
+            points = np.subtract(points, self.Origin, out=np.empty(points.shape, dtype=self.pointType),
+                                 casting="same_kind")
+        points = np.ascontiguousarray(points)
+        vtk_points = vtk.vtkPoints()
+        # numpy_to_vtk keeps a reference to points, so VTK can use its memory
+        vtk_points.SetData(numpy_to_vtk(points, deep=False))
+        return vtk_points
+
+    def addArray(self, data, attr_name, point=False):
+        """ Attaches a numpy array to the grid as cell data, or point data if point is
+            True, in a single call.
+            data = one value per cell (point), either flat in VTK order or shaped
+                   (nx, ny, nz) in C or Fortran memory order
+            Cell values of the whole grid are reduced to the active cells of an
+            active-cells-only grid.
+            float32, float64 and integer arrays are wrapped as they are, the VTK array
+            holds a reference to the numpy data instead of a copy. A copy is only made
+            when the values are not already contiguous in VTK (Fortran) order.
+        """
+        data = np.asarray(data)
+        if data.dtype.kind not in "fiu":
+            data = data.astype(float)
+        data = self.castProperty(data) if point else self.cellValues(data)
+        ac = numpy_to_vtk(np.ravel(data, order='F'), deep=False)
+        ac.SetName(attr_name)
+        if point:
+            self.Grid.GetPointData().AddArray(ac)
+        else:
+            self.Grid.GetCellData().AddArray(ac)
+        return ac
+
+    def gridAxes(self):
+        """ The X, Y and Z axis vectors of a rectilinear grid or image data
+        """
+        if self.GridType == "vtkRectilinearGrid":
+            return (vtk_to_numpy(self.Grid.GetXCoordinates()), vtk_to_numpy(self.Grid.GetYCoordinates()),
+                    vtk_to_numpy(self.Grid.GetZCoordinates()))
+        # image data axes are along the (diagonal) direction matrix
+        matrix = self.Grid.GetDirectionMatrix()
+        return tuple(self.Grid.GetOrigin()[a] + matrix.GetElement(a, a) * self.Grid.GetSpacing()[a] *
+                     np.arange(self.gridDimensions()[a]) for a in range(3))
+
+    def gridPoints(self):
+        """ (N, 3) point coordinates of the grid, generated from the axes for
+            rectilinear grids and image data
+        """
+        if self.GridType in ("vtkRectilinearGrid", "vtkImageData"):
+            return axesPoints(*self.gridAxes()).reshape(-1, 3)
+        points = vtk_to_numpy(self.Grid.GetPoints().GetData())
+        if np.any(self.Origin):
+            return points + self.Origin
+        return points
+
+    def gridArrays(self):
+        """ The VTK grid as a dict of numpy arrays, points (or axes), topology and the
+            cell and point data, for storing in a GridCache or an HDF5 store
+        """
+        arrays = {"GridType": self.GridType}
+        if self.GridType == "vtkStructuredGrid":
+            arrays["Points"] = vtk_to_numpy(self.Grid.GetPoints().GetData())
+            arrays["Origin"] = self.Origin
+            arrays["Dimensions"] = self.gridDimensions()
+        elif self.GridType in ("vtkRectilinearGrid", "vtkImageData"):
+            arrays["Dimensions"] = self.gridDimensions()
+            arrays["XCoordinates"], arrays["YCoordinates"], arrays["ZCoordinates"] = self.gridAxes()
+        elif self.GridType == "vtkUnstructuredGrid":
+            arrays["Points"] = vtk_to_numpy(self.Grid.GetPoints().GetData())
+            arrays["Origin"] = self.Origin
+            cells = self.Grid.GetCells()
+            arrays["Offsets"] = vtk_to_numpy(cells.GetOffsetsArray())
+            arrays["Connectivity"] = vtk_to_numpy(cells.GetConnectivityArray())
+            types = self.Grid.GetCellTypesArray()
+            if types is None:
+                # newer VTK does not store the type per cell when all cells share it
+                ncells = self.Grid.GetNumberOfCells()
+                types = np.full(ncells, self.Grid.GetCellType(0) if ncells else 0, dtype=np.uint8)
+            else:
+                types = vtk_to_numpy(types)
+            arrays["CellTypes"] = types
+        if self.GlobalIndex is not None:
+            arrays["GlobalIndex"] = self.GlobalIndex
+            arrays["ActiveIndex"] = self.ActiveIndex
+        for data, prefix in ((self.Grid.GetCellData(), "cell:"), (self.Grid.GetPointData(), "point:")):
+            for ia in range(data.GetNumberOfArrays()):
+                arrays[prefix + data.GetArrayName(ia)] = vtk_to_numpy(data.GetArray(ia))
+        return arrays
+
+    def restoreGrid(self, arrays):
+        """ Rebuilds the VTK grid from the arrays of gridArrays, without copying them
+        """
+        self.GridType = arrays["GridType"]
+        # points are stored relative to Origin, entries written before it existed have none
+        self.Origin = np.asarray(arrays.get("Origin", np.zeros(3)), dtype=float)
+        self.GlobalIndex = arrays.get("GlobalIndex")
+        self.ActiveIndex = arrays.get("ActiveIndex")
+        if self.GridType == "vtkStructuredGrid":
+            self.Grid = vtk.vtkStructuredGrid()
+            self.Grid.SetDimensions(*[int(d) for d in arrays["Dimensions"]])
+            self.Grid.SetPoints(self.buildPoints(arrays["Points"], relative=True))
+        elif self.GridType in ("vtkRectilinearGrid", "vtkImageData"):
+            self.buildAxesGrid(arrays["XCoordinates"], arrays["YCoordinates"], arrays["ZCoordinates"],
+                               self.GridType == "vtkImageData")
+        else:
+            self.Grid = vtk.vtkUnstructuredGrid()
+            self.Grid.SetPoints(self.buildPoints(arrays["Points"], relative=True))
+            cells = vtk.vtkCellArray()
+            cells.SetData(numpy_to_vtkIdTypeArray(np.ascontiguousarray(arrays["Offsets"], dtype=ID_TYPE), deep=True),
+                          numpy_to_vtkIdTypeArray(np.ascontiguousarray(arrays["Connectivity"], dtype=ID_TYPE), deep=True))
+            types = numpy_to_vtk(np.asarray(arrays["CellTypes"], dtype=np.uint8), deep=True,
+                                 array_type=vtk.VTK_UNSIGNED_CHAR)
+            self.Grid.SetCells(types, cells)
+        for name, data in arrays.items():
+            if name.startswith("cell:"):
+                self.addArray(data, name[5:])
+            elif name.startswith("point:"):
+                self.addArray(data, name[6:], point=True)
+
+    def loadCached(self, sources, tag):
+        """ Restores the attributes and the VTK grid stored by storeCached.
+            sources = files the grid was read from
+            tag = name of the loader and its arguments
+            returns False when there is no cache or no entry for the unchanged sources
+        """
+        if self.cache is None:
+            return False
+        values = self.cache.load(self.cache.key(sources, self.precisionTag(tag)))
+        if values is None:
+            return False
+        print("Loading " + tag + " from cache")
+        grid = {}
+        for name, value in values.items():
+            if name.startswith("vtk:"):
+                grid[name[4:]] = value
+            else:
+                setattr(self, name, value)
+        self.restoreGrid(grid)
+        return True
+
+    def storeCached(self, sources, tag, names):
+        """ Stores the named attributes and the VTK grid in the cache, if there is one
+        """
+        if self.cache is None:
+            return
+        # attributes dropped by the precision policy are None
+        values = dict((name, getattr(self, name)) for name in names if getattr(self, name) is not None)
+        for name, value in self.gridArrays().items():
+            values["vtk:" + name] = value
+        self.cache.store(self.cache.key(sources, self.precisionTag(tag)), values)
+
+    def precisionTag(self, tag):
+        """ Cached grids are kept apart by the precision of their points
+        """
+        return "%s %s" % (tag, np.dtype(self.pointType).name)
+
+    def cachedArray(self, sources, tag, read):
+        """ Returns read(), the array is taken from the cache while the sources are unchanged
+        """
+        if self.cache is None:
+            return read()
+        # keyed before reading, a source changed meanwhile is read again next time
+        key = self.cache.key(sources, tag)
+        values = self.cache.load(key)
+        if values is not None:
+            return values["data"]
+        data = read()
+        self.cache.store(key, {"data": data})
+        return data
+
+    def buildAxesGrid(self, X, Y, Z, image=None):
+        """ Builds a grid that only stores its axis vectors, a vtkImageData when the
+            spacing along every axis is constant and a vtkRectilinearGrid otherwise.
+            image = force (True) or refuse (False) image data, None decides by the spacing
+            Decreasing axes, e.g. depths, are kept in the order given, for image data
+            by flipping the direction matrix.
+        """
+        X, Y, Z = (np.asarray(a, dtype=float) for a in (X, Y, Z))
+        steps = [np.diff(a) for a in (X, Y, Z)]
+        if image is None:
+            image = all(len(d) > 0 and np.allclose(d, d[0]) and d[0] != 0 for d in steps)
+        if image:
+            self.GridType = "vtkImageData"
+            self.Grid = vtk.vtkImageData()
+            self.Grid.SetDimensions(len(X), len(Y), len(Z))
+            self.Grid.SetOrigin(X[0], Y[0], Z[0])
+            self.Grid.SetSpacing(*[abs(d[0]) for d in steps])
+            sx, sy, sz = [np.sign(d[0]) for d in steps]
+            self.Grid.SetDirectionMatrix(sx, 0, 0, 0, sy, 0, 0, 0, sz)
+        else:
+            self.GridType = "vtkRectilinearGrid"
+            self.Grid = vtk.vtkRectilinearGrid()
+            self.Grid.SetDimensions(len(X), len(Y), len(Z))
+            self.Grid.SetXCoordinates(numpy_to_vtk(X, deep=True))
+            self.Grid.SetYCoordinates(numpy_to_vtk(Y, deep=True))
+            self.Grid.SetZCoordinates(numpy_to_vtk(Z, deep=True))
+
+    def absoluteGrid(self):
+        """ The VTK grid with its points at their absolute coordinates. Grids with
+            points relative to Origin (see setPrecision) are shallow copied with float64
+            points, sharing the cell and point data.
+        """
+        if not np.any(self.Origin) or self.GridType not in ("vtkStructuredGrid", "vtkUnstructuredGrid"):
+            return self.Grid
+        grid = self.Grid.NewInstance()
+        grid.ShallowCopy(self.Grid)
+        points = vtk.vtkPoints()
+        points.SetData(numpy_to_vtk(self.gridPoints(), deep=False))
+        grid.SetPoints(points)
+        return grid
+
+    def exportGrid(self):
+        """ A shallow copy of absoluteGrid for the VTK writers and filters of the
+            exporters, its points, axes and data arrays are new VTK arrays on the same
+            memory. Writers and filters cache value ranges on the arrays they read,
+            the XML writers then write those out, so every export works on arrays of
+            its own. Files do not depend on earlier exports and exporters running on
+            threads (see exportAll) share no VTK objects.
+        """
+        grid = self.absoluteGrid()
+        copy = grid.NewInstance()
+        copy.ShallowCopy(grid)
+        if self.GridType == "vtkRectilinearGrid":
+            copy.SetXCoordinates(wrapArray(grid.GetXCoordinates()))
+            copy.SetYCoordinates(wrapArray(grid.GetYCoordinates()))
+            copy.SetZCoordinates(wrapArray(grid.GetZCoordinates()))
+        elif self.GridType != "vtkImageData":
+            points = vtk.vtkPoints()
+            points.SetData(wrapArray(grid.GetPoints().GetData()))
+            copy.SetPoints(points)
+        for data in (copy.GetCellData(), copy.GetPointData()):
+            # arrays of the same name are replaced
+            for array in [data.GetArray(ia) for ia in range(data.GetNumberOfArrays())]:
+                data.AddArray(wrapArray(array))
+        return copy
+
+    def keepActiveCells(self):
+        """ Replaces the grid by a vtkUnstructuredGrid holding only the active cells,
+            as hexahedra, and the points they use. Cell arrays and Prop keep the values
+            of the active cells, properties and time series read afterwards only store
+            those too (see cellValues).
+            Sets GlobalIndex, the global cell (VTK order) of every active cell, and
+            ActiveIndex, the active cell of every global cell (-1 for inactive cells).
+        """
+        if self.GridType not in STRUCTURED:
+            raise ValueError("Only structured grids can be reduced to their active cells")
+        nx, ny, nz = self.gridDimensions()
+        ncells = (nx - 1) * (ny - 1) * (nz - 1)
+        index = np.int32 if ncells < 2 ** 31 else np.int64
+        self.GlobalIndex = np.flatnonzero(self.activeMask()).astype(index)
+        self.ActiveIndex = np.full(ncells, -1, dtype=index)
+        self.ActiveIndex[self.GlobalIndex] = np.arange(len(self.GlobalIndex), dtype=index)
+        print("Keeping %i of %i cells" % (len(self.GlobalIndex), ncells))
+
+        # hexahedron corners, counter-clockwise around the bottom (k) face, then the top
+        i, j, k = np.unravel_index(self.GlobalIndex, (nx - 1, ny - 1, nz - 1), order="F")
+        first = i.astype(ID_TYPE) + nx * (j + ny * k.astype(ID_TYPE))
+        corners = np.array([0, 1, nx + 1, nx], dtype=ID_TYPE)
+        corners = np.concatenate((corners, corners + nx * ny))
+        connectivity = (first[:, None] + corners[None, :]).ravel()
+        # renumber the points used by active cells
+        used = np.zeros(nx * ny * nz, dtype=bool)
+        used[connectivity] = True
+        renumber = np.cumsum(used, dtype=ID_TYPE) - 1
+        connectivity = renumber[connectivity]
+        used = np.flatnonzero(used)
+
+        if self.GridType == "vtkStructuredGrid":
+            # points stay relative to Origin
+            points = self.buildPoints(vtk_to_numpy(self.Grid.GetPoints().GetData())[used], relative=True)
+        else:
+            points = self.buildPoints(self.gridPoints()[used])
+        old = self.Grid
+        self.GridType = "vtkUnstructuredGrid"
+        self.Grid = vtk.vtkUnstructuredGrid()
+        self.Grid.SetPoints(points)
+        offsets = np.arange(0, len(connectivity) + 1, 8, dtype=ID_TYPE)
+        cells = vtk.vtkCellArray()
+        cells.SetData(numpy_to_vtkIdTypeArray(offsets, deep=True), numpy_to_vtkIdTypeArray(connectivity, deep=True))
+        self.Grid.SetCells(vtk.VTK_HEXAHEDRON, cells)
+
+        for data, subset, point in ((old.GetCellData(), self.GlobalIndex, False), (old.GetPointData(), used, True)):
+            for ia in range(data.GetNumberOfArrays()):
+                self.addArray(vtk_to_numpy(data.GetArray(ia))[subset], data.GetArrayName(ia), point=point)
+        for name, value in self.Prop.items():
+            self.Prop[name] = self.cellValues(value)
+        # every cell left is active
+        self.ActiveCells = None
+
     def exportVTK(self, fname):
-        """ Saves the SUTRA grid as a VTK file, either a VTKStructuredGrid (.vts)
-            or a VTKUnstructuredGrid (.vtu) depending on mesh type.
-            fname = the filename it will be saved at, if no extension is given,
-            .vts is appended
+        """ Saves the SUTRA grid as a VTK file, either a VTKStructuredGrid (.vts),
+            a VTKUnstructuredGrid (.vtu), a VTKRectilinearGrid (.vtr) or VTKImageData
+            (.vti) depending on mesh type.
+            fname = the filename it will be saved at, the extension is replaced by
+            the one of the grid type
         """
         filename, ext = os.path.splitext(fname)
         if self.GridType == "vtkStructuredGrid":
             sWrite = vtk.vtkXMLStructuredGridWriter()
-            sWrite.SetInputData(self.Grid)
+            sWrite.SetInputData(self.exportGrid())
             sWrite.SetFileName(filename + ".vts")
             sWrite.Write()
+        elif self.GridType == "vtkRectilinearGrid":
+            sWrite = vtk.vtkXMLRectilinearGridWriter()
+            sWrite.SetInputData(self.exportGrid())
+            sWrite.SetFileName(filename + ".vtr")
+            sWrite.Write()
+        elif self.GridType == "vtkImageData":
+            sWrite = vtk.vtkXMLImageDataWriter()
+            sWrite.SetInputData(self.exportGrid())
+            sWrite.SetFileName(filename + ".vti")
+            sWrite.Write()
         elif self.GridType == "vtkUnstructuredGrid":
             sWrite = vtk.vtkXMLUnstructuredGridWriter()
-            sWrite.SetInputData(self.Grid)
+            sWrite.SetInputData(self.exportGrid())
             sWrite.SetFileName(filename + ".vtu")
             sWrite.Write()
         else:
             print("Grid type is not recognized")
 
-    def printCOORDS(self, f, p, fstr):
-        MAXL = 132
-        # if self.skip:
-        #    self.skip -= 1
-        #    return fstr
-        for point in p:
-            up = " %2.2f" % (point)
-            if len(fstr) + len(up) > MAXL:
-                f.write(fstr + "\n")
-                fstr = " "
-            fstr += up
-        return fstr
-
-    def printAC(self, f, p, N, fstr):
-        MAXL = 132
-        if N == 1:
-            up = " %i" % (p)
-        else:
-            up = " %i*%i" % (N, p)
-        if len(fstr) + len(up) > MAXL:
-            f.write(fstr + "\n")
-            fstr = " "
-        fstr += up
-        return fstr
-
-    def printPROP(self, f, p, N, fstr):
-        MAXL = 132
-        if N == 1:
-            # up = " %1.4e" %(p) # standard notation
-            up = " %1.4e" % (p)  # scientific notation
-        else:
-            up = " %i*%1.4e" % (N, p)
-            # up = " %i*%1.4e" %(N,p) # scientific notation
-        if len(fstr) + len(up) > MAXL:
-            f.write(fstr + "\n")
-            fstr = " "
-        fstr += up
-        return fstr
+    def exportHDF5(self, fname, compression="gzip"):
+        """ Saves the grid, its active cells and every cell and point array to an HDF5
+            store (needs h5py). Arrays are chunked and compressed datasets, arrays named
+            title[time] are kept as the timesteps of a time series.
+        """
+        filename, ext = os.path.splitext(fname)
+        writeStore(filename + (ext or ".h5"), self.gridArrays(), compression)
+
+    def loadHDF5(self, fname):
+        """ Opens an HDF5 store written by exportHDF5. Only the geometry and the active
+            cells are read, properties and timesteps stay on disk until loadStored
+            asks for them, the store is kept as self.store.
+        """
+        self.store = GridStore(fname)
+        self.restoreGrid(self.store.geometry())
+        if "ActiveCells" in self.store.properties:
+            self.loadStored("ActiveCells")
+            if self.GridType in STRUCTURED:
+                self.ActiveCells = np.reshape(self.store.read("ActiveCells"), self.gridDimensions() - 1, order="F")
+            else:
+                self.ActiveCells = self.store.read("ActiveCells")
+
+    def loadStored(self, names):
+        """ Reads properties or timesteps (title[time]) from the store opened by
+            loadHDF5 and attaches them to the grid
+            names = a name or a list of names
+        """
+        if isinstance(names, str):
+            names = [names]
+        for name in names:
+            self.addArray(self.store.read(name), name, point=self.store.isPoint(name))
 
     def exportTOUGH2(self, fname):
         """Saves the grid as a fixed format TOUGH(2) grid.
         """
         STR = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
-        self.ne, self.nn, self.nz = np.array(self.Grid.GetDimensions())  # - 1 #
+        self.requireStructured("TOUGH2")
+        ne, nn, nz = self.gridDimensions()  # - 1 #
         filename, ext = os.path.splitext(fname)
-        if self.GridType == "vtkStructuredGrid":
-            with io.open(filename, 'w', newline='\r\n') as f:
-                f.write("ELEME")
-                # debug
-                f.write(
-                    """
-                    1        10        20        30        40        50        60        70        80
-                    |--------|---------|---------|---------|---------|---------|---------|---------|
-                    12345678901234567890123456789012345678901234567890123456789012345678901234567890
-                    """)
-
-                ii = 0
-                for iy in range(self.nn):
-                    for ix in range(self.ne):
-                        # f.write(str(iy)+str(ix)+"\n")
-                        # first base
-                        b2 = ii // (len(STR) * len(STR))
-                        b1 = (ii - len(STR) * b2) // len(STR)
-                        b0 = ii % len(STR)
-
-                        f.write(STR[b2] + STR[b1] + STR[b0] + "\t" + str(ii) + "\n")
-                        ii += 1
+        with io.open(filename, 'w', newline='\r\n') as f:
+            f.write("ELEME")
+            # debug
+            f.write(
+                """
+                1        10        20        30        40        50        60        70        80
+                |--------|---------|---------|---------|---------|---------|---------|---------|
+                12345678901234567890123456789012345678901234567890123456789012345678901234567890
+                """)
+
+            ii = 0
+            for iy in range(nn):
+                for ix in range(ne):
+                    # f.write(str(iy)+str(ix)+"\n")
+                    # first base
+                    b2 = ii // (len(STR) * len(STR))
+                    b1 = (ii - len(STR) * b2) // len(STR)
+                    b0 = ii % len(STR)
+
+                    f.write(STR[b2] + STR[b1] + STR[b0] + "\t" + str(ii) + "\n")
+                    ii += 1
+
+    def exportAll(self, fname, formats=("vtk", "ecl", "tough2"), nthreads=None):
+        """ Runs several exporters at the same time on threads. The VTK writers and
+            filters each work on their own copy of the grid (see exportGrid), the
+            files are the same as those written one after the other.
+            fname = base file name handed to every exporter
+            formats = any of "vtk", "ecl", "eclprops", "eclbinary", "hdf5" and "tough2"
+            nthreads = number of threads, by default one per exporter
+            returns a dict of format -> (seconds, exception or None), an exporter
+            that fails does not stop the others
+        """
+        exporters = {
+            "vtk": self.exportVTK,
+            "ecl": self.exportECL,
+            # serial by default, worker processes are not forked from the export threads
+            "eclprops": self.exportECLPropertyFiles,
+            "eclbinary": self.exportECLBinary,
+            "hdf5": self.exportHDF5,
+            "tough2": self.exportTOUGH2,
+        }
+        for fmt in formats:
+            if fmt not in exporters:
+                raise KeyError("unknown export format %s" % fmt)
+
+        def run(fmt):
+            start = perf_counter()
+            try:
+                exporters[fmt](fname)
+                error = None
+            except Exception as e:
+                error = e
+            return perf_counter() - start, error
+
+        with ThreadPoolExecutor(max_workers=nthreads or len(formats) or 1) as pool:
+            futures = {fmt: pool.submit(run, fmt) for fmt in formats}
+            results = {fmt: future.result() for fmt, future in futures.items()}
+        for fmt, (seconds, error) in results.items():
+            print("export", fmt, "%.2f s" % seconds, "failed: %s" % error if error else "")
+        return results
+
+    def eclGeometry(self):
+        """ Returns the ECLIPSE COORD (top and bottom point of every pillar) and ZCORN
+            (eight corner depths per cell) arrays. Grids read from corner point input
+            hand back their COORD and CornerDepths, so faults are kept. Otherwise the
+            points of the structured grid are pulled out of VTK once and the arrays
+            built with array indexing, cells then share the depths of their nodes.
+        """
+        ne, nn, nz = self.gridDimensions() - 1
+        depths = getattr(self, "CornerDepths", None)
+        if self.GridType == "vtkStructuredGrid" and depths is not None and depths.shape == (ne, nn, nz, 8):
+            return np.ravel(self.coords), np.ravel(cornerZcorn(depths))
+        points = np.reshape(self.gridPoints(), (nz + 1, nn + 1, ne + 1, 3))
+
+        # pillars run through I, then J, each with its top and bottom point
+        coord = np.stack((points[0], points[nz]), axis=2)
+
+        # ZCORN runs through the W/E corner, I, the S/N face, J, top/bottom and then K
+        Z = points[..., 2]
+        zcorn = np.empty((nz, 2, nn, 2, ne, 2))
+        for t in range(2):
+            for jy in range(2):
+                for ix in range(2):
+                    zcorn[:, t, :, jy, :, ix] = Z[t:nz + t, jy:nn + jy, ix:ne + ix]
+        return coord.ravel(), zcorn.ravel()
 
     def exportECL(self, fname):
         """ Saves the grid as an ECLIPSE grid. For the purposes of ECLIPSE
         """
 
         # TODO add consistency of dimensions across the inputs
-        self.ne, self.nn, self.nz = np.array(self.Grid.GetDimensions()) - 1  # ECLIPSE
+        self.requireStructured("ECLIPSE")
+        ne, nn, nz = self.gridDimensions() - 1  # ECLIPSE
         filename, ext = os.path.splitext(fname)
-        if self.GridType == "vtkStructuredGrid":
-            with io.open(filename + ".GRDECL", 'w', newline='\r\n') as f:
-                f.write('-- Generated [\n')
-                f.write('-- Format      : ECLIPSE keywords (grid geometry and properties) (ASCII)\n')
-                # f.write('-- Exported by : Petrel 2013.7 (64-bit) Schlumberger\n'
-                f.write('-- Exported by : ReGrid v.' + version + "\n")
-                f.write('-- User name   : ' + getpass.getuser() + "\n")
-                f.write('-- Date        : ' + datetime.now().strftime("%A, %B %d %Y %H:%M:%S") + "\n")
-                f.write('-- Project     : ' + "ReGrid project\n")
-                f.write('-- Grid        : ' + "Description\n")
-                f.write('-- Generated ]\n\n')
-
-                f.write('SPECGRID                               -- Generated : ReGrid\n')
-                f.write('  %i %i %i 1 F /\n\n' % (self.ne, self.nn, self.nz))
-                f.write('COORDSYS                               -- Generated : ReGrid\n')
-                f.write('  1 4 /\n\n')  # what is this line?
-
-                f.write('COORD                                  -- Generated : ReGrid\n')
-                nz = self.nz
-                fstr = str(" ")
-
-                for iy in range(self.nn):
-                    for ix in range(self.ne):
-                        p0 = self.Grid.GetCell(ix, iy, 0).GetPoints().GetPoint(0)
-                        fstr = self.printCOORDS(f, p0, fstr)
-                        p1 = self.Grid.GetCell(ix, iy, nz - 1).GetPoints().GetPoint(4)
-                        fstr = self.printCOORDS(f, p1, fstr)
-                    # outside edge on far x
-                    p2 = self.Grid.GetCell(ix, iy, 0).GetPoints().GetPoint(1)
-                    fstr = self.printCOORDS(f, p2, fstr)
-                    p3 = self.Grid.GetCell(ix, iy, nz - 1).GetPoints().GetPoint(5)
-                    fstr = self.printCOORDS(f, p3, fstr)
-                # outside edge on far y
-                for ix in range(self.ne):
-                    p8 = self.Grid.GetCell(ix, iy, 0).GetPoints().GetPoint(3)
-                    fstr = self.printCOORDS(f, p8, fstr)
-                    p9 = self.Grid.GetCell(ix, iy, nz - 1).GetPoints().GetPoint(7)
-                    fstr = self.printCOORDS(f, p9, fstr)
-                # outside edge on far northeast
-                p14 = self.Grid.GetCell(ix, iy, 0).GetPoints().GetPoint(2)
-                fstr = self.printCOORDS(f, p14, fstr)
-                p15 = self.Grid.GetCell(ix, iy, nz - 1).GetPoints().GetPoint(6)
-                fstr = self.printCOORDS(f, p15, fstr)
-                f.write(fstr)
-                fstr = " "
-                f.write(" /")
-                f.write("\n")
-                f.write("\n")
-
-                f.write('ZCORN                                  -- Generated : ReGrid\n')
-                for iz in range(self.nz):
-                    for iy in range(self.nn):
-                        # front face
-                        for ix in range(self.ne):
-                            p0 = self.Grid.GetCell(ix, iy, iz).GetPoints().GetPoint(0)
-                            p1 = self.Grid.GetCell(ix, iy, iz).GetPoints().GetPoint(1)
-                            fstr = self.printCOORDS(f, [p0[2]], fstr)
-                            fstr = self.printCOORDS(f, [p1[2]], fstr)
-                        # back face
-                        for ix in range(self.ne):
-                            p0 = self.Grid.GetCell(ix, iy, iz).GetPoints().GetPoint(3)
-                            p1 = self.Grid.GetCell(ix, iy, iz).GetPoints().GetPoint(2)
-                            fstr = self.printCOORDS(f, [p0[2]], fstr)
-                            fstr = self.printCOORDS(f, [p1[2]], fstr)
-                    # bottom layer
-                    for iy in range(self.nn):
-                        # front face
-                        for ix in range(self.ne):
-                            p0 = self.Grid.GetCell(ix, iy, iz).GetPoints().GetPoint(4)
-                            p1 = self.Grid.GetCell(ix, iy, iz).GetPoints().GetPoint(5)
-                            fstr = self.printCOORDS(f, [p0[2]], fstr)
-                            fstr = self.printCOORDS(f, [p1[2]], fstr)
-                        # back face
-                        for ix in range(self.ne):
-                            p0 = self.Grid.GetCell(ix, iy, iz).GetPoints().GetPoint(7)
-                            p1 = self.Grid.GetCell(ix, iy, iz).GetPoints().GetPoint(6)
-                            fstr = self.printCOORDS(f, [p0[2]], fstr)
-                            fstr = self.printCOORDS(f, [p1[2]], fstr)
-                f.write(fstr)
-                fstr = " "
-                f.write(" /")
-                f.write("\n")
-                f.write("\n")
-                f.write('ACTNUM                                 -- Generated : ReGrid\n')
-
-                c = -999
-                N = 0
-                for iac in self.ActiveCells.flatten(order='F'):
-                    if iac == c:
-                        N += 1
-                    else:
-                        if c != -999:
-                            fstr = self.printAC(f, c, N, fstr)
-                        c = iac
-                        N = 1
-                fstr = self.printAC(f, c, N, fstr)
-                f.write(fstr)
-                f.write(" /")
-                f.write("\n")
-                f.write("\n")
-        else:
-            print("Only structured grids can be converted to ECLIPSE files")
-
-    def exportECLPropertyFiles(self, fname):
-        """ Convert any point data to cell data
+        with io.open(filename + ".GRDECL", 'w', newline='\r\n') as f:
+            f.write('-- Generated [\n')
+            f.write('-- Format      : ECLIPSE keywords (grid geometry and properties) (ASCII)\n')
+            # f.write('-- Exported by : Petrel 2013.7 (64-bit) Schlumberger\n'
+            f.write('-- Exported by : ReGrid v.' + version + "\n")
+            f.write('-- User name   : ' + getpass.getuser() + "\n")
+            f.write('-- Date        : ' + datetime.now().strftime("%A, %B %d %Y %H:%M:%S") + "\n")
+            f.write('-- Project     : ' + "ReGrid project\n")
+            f.write('-- Grid        : ' + "Description\n")
+            f.write('-- Generated ]\n\n')
+
+            f.write('SPECGRID                               -- Generated : ReGrid\n')
+            f.write('  %i %i %i 1 F /\n\n' % (ne, nn, nz))
+            f.write('COORDSYS                               -- Generated : ReGrid\n')
+            f.write('  1 4 /\n\n')  # what is this line?
+
+            coord, zcorn = self.eclGeometry()
+
+            f.write('COORD                                  -- Generated : ReGrid\n')
+            writeValues(f, coord, "%2.2f", perline=6)
+            f.write(" /")
+            f.write("\n")
+            f.write("\n")
+
+            f.write('ZCORN                                  -- Generated : ReGrid\n')
+            writeValues(f, zcorn, "%2.2f", perline=8)
+            f.write(" /")
+            f.write("\n")
+            f.write("\n")
+            f.write('ACTNUM                                 -- Generated : ReGrid\n')
+
+            writeRepeats(f, self.activeMask(), "%i", perline=16)
+            f.write(" /")
+            f.write("\n")
+            f.write("\n")
+
+    def exportECLPropertyFiles(self, fname, nproc=1):
+        """ Writes every cell array to its own GRDECL property file, point data is
+            converted to cell data first.
+            nproc = number of worker processes, each property file is then written
+                    by its own worker, None uses one per core. By default the files
+                    are written serially, the pool only pays off for many large
+                    properties.
         """
 
+        self.requireStructured("ECLIPSE property")
+
         # Convert point data to cell data for output
         # verifying if this is necessary or if ECLIPSE can use point attributes
+        grid = self.Grid
         pointConvert = True
         if pointConvert:
             p2c = vtk.vtkPointDataToCellData()
-            p2c.SetInputDataObject(self.Grid)
+            p2c.SetInputDataObject(self.exportGrid())
             p2c.PassPointDataOn()
             p2c.Update()
-            self.Grid = p2c.GetOutput()
+            grid = p2c.GetOutput()
 
         filename, ext = os.path.splitext(fname)
-        for ia in range(self.Grid.GetCellData().GetNumberOfArrays()):
-            prop = self.Grid.GetCellData().GetArray(ia).GetName()
-            print ("exporting prop", prop)
-            if self.GridType == "vtkStructuredGrid":
-                with io.open(filename + "prop-" + prop.lower() + ".GRDECL", 'w', newline='\r\n') as f:
-                    f.write('-- Generated [\n')
-                    f.write('-- Format      : ECLIPSE keywords (grid properties) (ASCII)\n')
-                    f.write('-- Exported by : ReGrid v.' + version + "\n")
-                    f.write('-- User name   : ' + getpass.getuser() + "\n")
-                    f.write('-- Date        : ' + datetime.now().strftime("%A, %B %d %Y %H:%M:%S") + "\n")
-                    f.write('-- Project     : ' + "ReGrid project\n")
-                    f.write('-- Grid        : ' + "Description\n")
-                    f.write('-- Unit system : ' + "ECLIPSE-Field\n")
-                    f.write('-- Generated ]\n\n')
-
-                    f.write(prop.upper() + '                                 -- Generated : ReGrid\n')
-                    f.write('-- Property name in Petrel : ' + prop + '\n')
-
-                    c = -999.9999
-                    N = 0
-                    ii = 0
-                    fstr = " "
-                    for iz in range(self.nz):
-                        for iy in range(self.nn):
-                            for ix in range(self.ne):
-                                # iac = round(self.Grid.GetCellData().GetArray(ia).GetTuple1(ii), 4)
-                                iac = '{:0.4e}'.format(self.Grid.GetCellData().GetArray(ia).GetTuple1(ii))
-                                print (iac)
-                                ii += 1
-                                if iac == c:
-                                    N += 1
-                                else:
-                                    if c != -999.9999:
-                                        fstr = self.printPROP(f, c, N, fstr)
-                                    c = eval(iac)
-                                    N = 1
-                    fstr = self.printPROP(f, c, N, fstr)
-                    f.write(fstr)
-                    f.write(" /")
-                    f.write("\n")
+        jobs = []
+        for ia in range(grid.GetCellData().GetNumberOfArrays()):
+            prop = grid.GetCellData().GetArray(ia).GetName()
+            values = vtk_to_numpy(grid.GetCellData().GetArray(ia))
+            jobs.append((filename + "prop-" + prop.lower() + ".GRDECL", prop, values))
+
+        if nproc == 1 or len(jobs) < 2:
+            for job in jobs:
+                print("exporting prop", job[1])
+                writeECLProperty(*job)
+        else:
+            with ProcessPoolExecutor(max_workers=nproc) as pool:
+                futures = [pool.submit(writeECLProperty, *job) for job in jobs]
+                for job, future in zip(jobs, futures):
+                    future.result()
+                    print("exported prop", job[1])
+
+    def exportECLBinary(self, fname):
+        """ Saves the grid as unformatted (binary) ECLIPSE files, written straight from numpy
+            fname.EGRID = grid geometry and ACTNUM
+            fname.BGRDECL = cell properties, one full grid keyword per cell array,
+                            point data is converted to cell data first
+        """
+        self.requireStructured("ECLIPSE")
+        ne, nn, nz = self.gridDimensions() - 1
+        filename, ext = os.path.splitext(fname)
+        coord, zcorn = self.eclGeometry()
+
+        # FILEHEAD: version, release year, ..., grid type 0 (corner point), no dual porosity
+        filehead = np.zeros(100, dtype=np.int32)
+        filehead[0:2] = 3, 2007
+        # GRIDHEAD: grid type 1 (corner point) and the dimensions
+        gridhead = np.zeros(100, dtype=np.int32)
+        gridhead[0:4] = 1, ne, nn, nz
+
+        with open(filename + ".EGRID", "wb") as fp:
+            writeRecord(fp, "FILEHEAD", filehead)
+            writeRecord(fp, "GRIDHEAD", gridhead)
+            writeRecord(fp, "COORD", coord, "REAL")
+            writeRecord(fp, "ZCORN", zcorn, "REAL")
+            writeRecord(fp, "ACTNUM", self.activeMask(), "INTE")
+            writeRecord(fp, "ENDGRID", np.zeros(0, dtype=np.int32))
+
+        p2c = vtk.vtkPointDataToCellData()
+        p2c.SetInputDataObject(self.exportGrid())
+        p2c.PassPointDataOn()
+        p2c.Update()
+        cellData = p2c.GetOutput().GetCellData()
+        with open(filename + ".BGRDECL", "wb") as fp:
+            writeRecord(fp, "SPECGRID", np.array([ne, nn, nz, 1], dtype=np.int32))
+            for ia in range(cellData.GetNumberOfArrays()):
+                prop = cellData.GetArray(ia).GetName()
+                values = np.ravel(vtk_to_numpy(cellData.GetArray(ia)))
+                print("exporting prop", prop)
+                # keywords are at most 8 characters
+                writeRecord(fp, prop.upper()[:8], values, "INTE" if values.dtype.kind in "iu" else "REAL")
+
+
+def writeECLProperty(fname, prop, values):
+    """ Writes one cell property as a GRDECL file. Module level, so that it can be
+        run in a worker process by exportECLPropertyFiles.
+    """
+    with io.open(fname, 'w', newline='\r\n') as f:
+        f.write('-- Generated [\n')
+        f.write('-- Format      : ECLIPSE keywords (grid properties) (ASCII)\n')
+        f.write('-- Exported by : ReGrid v.' + version + "\n")
+        f.write('-- User name   : ' + getpass.getuser() + "\n")
+        f.write('-- Date        : ' + datetime.now().strftime("%A, %B %d %Y %H:%M:%S") + "\n")
+        f.write('-- Project     : ' + "ReGrid project\n")
+        f.write('-- Grid        : ' + "Description\n")
+        f.write('-- Unit system : ' + "ECLIPSE-Field\n")
+        f.write('-- Generated ]\n\n')
+
+        f.write(prop.upper() + '                                 -- Generated : ReGrid\n')
+        f.write('-- Property name in Petrel : ' + prop + '\n')
+
+        # runs are found at the written precision of five significant digits
+        writeRepeats(f, roundSignificant(values, 5), "%1.4e", perline=8)
+        f.write(" /")
+        f.write("\n")
 
 
 class GRDECL(FlowGrid):
@@ -289,68 +797,47 @@ class GRDECL(FlowGrid):
         super(GRDECL, self).__init__()
         nx, ny, nz = 0, 0, 0
 
-    def loadNodes(self, fname):
+    def loadNodes(self, fname, mmap=False, rectilinear=False, tolerance=TOLERANCE, activeOnly=False):
         """
             Reads I, J(max), K
                   iterates through I, then decriments J, increments K
                   I = easting
                   J = northing
                   K = depth or elevation?
+            mmap = memory-map the file, the large COORD, ZCORN and ACTNUM blocks
+                   are then parsed in chunks straight into preallocated arrays
+            rectilinear, tolerance = see buildGeometry
+            activeOnly = keep the active cells only, see keepActiveCells
+            With a cache set, an unchanged file is loaded from it instead of parsed.
         """
-        with open(fname, "r") as fp:
-
-            # Read in the header
-            for line in fp:
-                item = line.split()
-                if len(item) > 0:
-                    if item[0] == "SPECGRID":
-                        self.SPECGRID = np.array(fp.readline().split()[0:3], dtype=int)
-                    if item[0] == "COORDSYS":
-                        self.COORDSYS = fp.readline().split()
-                    if item[0] == "COORD":
-                        break
-
-            # Read in the coordinates
-            self.coords = []
-            for line in fp:
-                if line.split()[-1] != "/":
-                    self.coords += line.split()
-                else:
-                    self.coords += line.split()[0:-1]
-                    break
-
-            # Read in ZCORN
-            self.zcorn = []
-            i = 0
-            for line in fp:
-                item = line.split()
-                if len(item) > 0:
-                    if item[0] == "ZCORN":
-                        for line in fp:
-                            if line.split():
-                                if line.split()[-1] != "/":
-                                    self.zcorn += line.split()
-                                else:
-                                    self.zcorn += line.split()[0:-1]
-                                    break
-                if len(self.zcorn) > 0:
-                    break
+        tag = "GRDECL.loadNodes %s %g" % (rectilinear, tolerance)
+        if self.loadCached([fname], tag):
+            self.active = np.ravel(self.ActiveCells, order="F")
+            self.buildGrid(plot=False)
+            self.zcorn = None
+            if self.GridType == "vtkStructuredGrid":
+                # only CornerDepths is cached, ZCORN and the node depths follow from it
+                Z = cornerZcorn(self.CornerDepths)
+                self.buildNodeDepths(Z)
+                if self.pointType == np.float64:
+                    self.zcorn = np.ravel(Z)
+            if activeOnly:
+                self.keepActiveCells()
+            return
+
+        with KeywordFile(fname, mapped=mmap) as kf:
+            self.SPECGRID = np.array(kf.read("SPECGRID")[0:3], dtype=int)
+            if "COORDSYS" in kf:
+                self.COORDSYS = kf.read("COORDSYS")
+            ne, nn, nz = self.SPECGRID
+            self.coords = kf.read("COORD", size=6 * (ne + 1) * (nn + 1))
+            self.zcorn = kf.read("ZCORN", size=8 * ne * nn * nz)
+            # ECLIPSE treats every cell as active when ACTNUM is not given
+            if "ACTNUM" in kf:
+                self.active = kf.read("ACTNUM", size=ne * nn * nz)
+            else:
+                self.active = np.ones(ne * nn * nz, dtype=int)
 
-            # Read in (in)active cells
-            self.active = []
-            for line in fp:
-                item = line.split()
-                if len(item) > 0:
-                    if item[0] == "ACTNUM":
-                        for line in fp:
-                            if line.split():
-                                if line.split()[-1] != "/":
-                                    self.active += line.split()
-                                else:
-                                    self.active += line.split()[0:-1]
-                                    break
-
-        self.coords = np.array(self.coords, dtype=float)
         print(self.coords)
 
         # In Petrel...
@@ -358,39 +845,62 @@ class GRDECL(FlowGrid):
         self.nn = self.SPECGRID[1]  # y  j
         self.nz = self.SPECGRID[2]  # z  k
 
-        # build grid
+        if self.buildGeometry(rectilinear, tolerance):
+            self.storeCached([fname], tag, ("SPECGRID", "ne", "nn", "nz", "coords", "ActiveCells"))
+        else:
+            self.storeCached([fname], tag,
+                             ("SPECGRID", "ne", "nn", "nz", "coords", "ActiveCells", "CornerDepths"))
+        if activeOnly:
+            self.keepActiveCells()
+
+    def buildGeometry(self, rectilinear=False, tolerance=TOLERANCE):
+        """ Builds the VTK grid from the COORD, ZCORN and ACTNUM arrays. When the
+            pillars are vertical and the layers flat within tolerance (a fraction of
+            the grid extent, see rectilinearAxes) and rectilinear is set, the grid
+            is only held as its axes, as image data or a rectilinear grid, and ZCORN
+            is dropped. exportECL rebuilds COORD and ZCORN from the axes.
+            rectilinear is off by default, as the implicit grids are exported as .vtr
+            or .vti files rather than .vts
+            returns True for the implicit grid
+        """
+        axes = None
+        if rectilinear:
+            zcorn = castValues(self.zcorn, float, 8 * self.ne * self.nn * self.nz)
+            axes = rectilinearAxes(self.coords, zcorn, self.ne, self.nn, self.nz, tolerance)
+        if axes is None:
+            self.buildStructuredGrid()
+            return False
+
+        print("Rectilinear geometry, keeping the axes only")
         self.buildGrid(plot=False)
-        # self.buildActiveCells(plot=False)
-        # self.buildZGrid(plot=False)
-        # self.calculateVolumes(plot=False)
-        #
-        # # Convert to VTK
-        # self.GridType = "vtkStructuredGrid"
-        # self.Grid = vtk.vtkStructuredGrid()
-        # self.Grid.SetDimensions(self.ne+1, self.nn+1, self.nz+1)
-        # vtk_points = vtk.vtkPoints()
-        # ve = 1.
-        #
-        # for iz in range(self.nz):
-        #     if iz == 0:
-        #         for iy in range(self.nn+1):
-        #             for ix in range(self.ne+1):
-        #                 vtk_points.InsertNextPoint( self.X0[ix,iy], \
-        #                                             self.Y0[ix,iy], \
-        #                                        ve * self.ZZT[iz][ix,iy] )
-        #     for iy in range(self.nn+1):
-        #         for ix in range(self.ne+1):
-        #             vtk_points.InsertNextPoint( self.X0[ix,iy], \
-        #                                         self.Y0[ix,iy], \
-        #                                    ve * self.ZZB[iz][ix,iy] )
-        # self.Grid.SetPoints(vtk_points)
-        #
-        # # Add in active cells
-        # ac = vtk.vtkIntArray()
-        # ac.SetName( "ActiveCells" )
-        # for iac in self.ActiveCells.flatten( order='F' ):
-        #     ac.InsertNextTuple1( iac )
-        # self.Grid.GetCellData().AddArray(ac)
+        self.buildActiveCells(plot=False)
+        self.zcorn = None
+        self.buildAxesGrid(*axes)
+        self.addArray(self.ActiveCells, "ActiveCells")
+        return True
+
+    def buildStructuredGrid(self):
+        """ Builds the vtkStructuredGrid, with ActiveCells attached, from the COORD,
+            ZCORN and ACTNUM arrays. Each grid node takes its depth from one of the
+            cell corners meeting at it, see buildZGrid.
+        """
+        self.buildGrid(plot=False)
+        self.buildActiveCells(plot=False)
+        self.buildZGrid(plot=False)
+
+        # Convert to VTK, points run through x, then y, then z. Nodes sit on their
+        # pillar at their depth, sloped pillars move them in x and y.
+        ZZ = np.concatenate((self.ZZT[0:1], self.ZZB))
+        XX, YY = pillarPoints((self.X0, self.Y0, self.Z0), (self.X1, self.Y1, self.Z1), ZZ)
+        points = np.stack((XX, YY, ZZ), axis=-1).transpose(0, 2, 1, 3).reshape(-1, 3)
+
+        self.GridType = "vtkStructuredGrid"
+        self.Grid = vtk.vtkStructuredGrid()
+        self.Grid.SetDimensions(self.ne + 1, self.nn + 1, self.nz + 1)
+        self.Grid.SetPoints(self.buildPoints(points))
+
+        # Add in active cells
+        self.addArray(self.ActiveCells, "ActiveCells")
 
     def buildGrid(self, plot=False):
         """
@@ -425,23 +935,23 @@ class GRDECL(FlowGrid):
         print('points e')
         print(self.points["e"])
 
-        # # Here are the coordinates
-        # self.X0 = np.reshape(self.points["e"][0::2] , (self.ndx,self.ndy), order="F")
-        # self.Y0 = np.reshape(self.points["n"][0::2] , (self.ndx,self.ndy), order="F")
-        # self.Z0 = np.reshape(self.points["z"][0::2] , (self.ndx,self.ndy), order="F")
-        #
-        # self.X1 = np.reshape(self.points["e"][1::2] , (self.ndx,self.ndy), order="F")
-        # self.Y1 = np.reshape(self.points["n"][1::2] , (self.ndx,self.ndy), order="F")
-        # self.Z1 = np.reshape(self.points["z"][1::2] , (self.ndx,self.ndy), order="F")
-        #
-        # # visualize
-        # if plot:
-        #     print("plotting")
-        #     fig = plt.figure()
-        #     ax = fig.add_subplot(111, projection='3d')
-        #     ax.plot_wireframe(f2m*self.X0, f2m*self.Y0, f2m*self.Z0, rstride=1, cstride=1)
-        #     ax.plot_wireframe(f2m*self.X1, f2m*self.Y1, f2m*self.Z1, rstride=1, cstride=1)
-        #     plt.show()
+        # Here are the coordinates
+        self.X0 = np.reshape(self.points["e"][0::2], (self.ndx, self.ndy), order="F")
+        self.Y0 = np.reshape(self.points["n"][0::2], (self.ndx, self.ndy), order="F")
+        self.Z0 = np.reshape(self.points["z"][0::2], (self.ndx, self.ndy), order="F")
+
+        self.X1 = np.reshape(self.points["e"][1::2], (self.ndx, self.ndy), order="F")
+        self.Y1 = np.reshape(self.points["n"][1::2], (self.ndx, self.ndy), order="F")
+        self.Z1 = np.reshape(self.points["z"][1::2], (self.ndx, self.ndy), order="F")
+
+        # visualize
+        if plot:
+            print("plotting")
+            fig = plt.figure()
+            ax = fig.add_subplot(111, projection='3d')
+            ax.plot_wireframe(f2m * self.X0, f2m * self.Y0, f2m * self.Z0, rstride=1, cstride=1)
+            ax.plot_wireframe(f2m * self.X1, f2m * self.Y1, f2m * self.Z1, rstride=1, cstride=1)
+            plt.show()
 
     def buildZGrid(self, plot=False):
         """
@@ -460,90 +970,26 @@ class GRDECL(FlowGrid):
             This pattern is then repeated for each depth layer, it isn't that clear, but my ASCII art skills
             are already sufficiently challenged.
 
+            Sets ZZ, the (nz, 2, ndx, ndy) node depths of the layer tops (ZZT) and bottoms (ZZB),
+            and returns CornerDepths, the (ne, nn, nz, 8) depths of the eight corners of each cell.
+            Both are in the point precision of setPrecision.
         """
 
         print("Constructing Z corners")
 
-        # self.zcorn = np.array(self.zcorn, dtype=float)
-        # temp = np.zeros( ((self.ne+1)*(self.nn+1)*self.nz) )
-        temp = []
-        count = 0
-        for item in self.zcorn:
-
-            if "*" in item:
-                ct = (int)(item.split("*")[0])
-                vl = (float)(item.split("*")[1])
-                temp += np.tile(vl, ct).tolist()
-                count += ct
-            else:
-                temp += [(float)(item)]
-                count += 1
-
-        # layers = np.resize(temp, (8, self.ne*self.nn*self.nz ))
-        layers = np.resize(temp, (self.nz * 2, self.ne * self.nn * 4))
-        """
-        plt.plot(newtemp[0,:])                    # TOP     0    0
-        plt.plot(newtemp[1,:])       # SAME --    # BOTTOM  0    1
-        #plt.plot(newtemp[2,:])      # SAME --    # TOP     1    2
+        zcorn = castValues(self.zcorn, float, 8 * self.ne * self.nn * self.nz)
+        # ZCORN runs through the W/E corner, I, the S/N face, J, top/bottom and then K
+        Z = np.reshape(zcorn, (self.nz, 2, self.nn, 2, self.ne, 2))
 
-        plt.plot(newtemp[3,:])       # SAME --    # BOTTOM  1    3
-        #plt.plot(newtemp[4,:])      # SAME --    # TOP     2    4
+        # Eight corner depths per cell, (ne, nn, nz, 8), corners in ZCORN order:
+        # top SW, SE, NW, NE followed by bottom SW, SE, NW, NE
+        self.CornerDepths = np.reshape(Z.transpose(4, 2, 0, 1, 3, 5).astype(self.pointType),
+                                       (self.ne, self.nn, self.nz, 8))
 
-        plt.plot(newtemp[5,:])       # SAME --    # BOTTOM  2    5
-        #plt.plot(newtemp[6,:])      # SAME --    # TOP     3    6
-        plt.plot(newtemp[7,:])                    # BOTTOM  3    7
-        """
-        self.ZZT = {}  # zztop ha ha...two year's later this is still funny -TI
-        self.ZZB = {}
-        for ilay in range(self.nz):
-            self.ZZT[ilay] = np.zeros((self.ndx, self.ndy))
-            self.ZZB[ilay] = np.zeros((self.ndx, self.ndy))
-            iis = 0
-            # plt.plot(layers[ilay*2])
-            for iin in range(self.nn):
-                nears = {}
-                fars = {}
-                bnears = {}
-                bfars = {}
-                for iif in range(2):
-                    # top
-                    nears[iif] = layers[ilay * 2][iis:iis + 2 * self.ne][0::2].tolist()
-                    fars[iif] = layers[ilay * 2][iis:iis + 2 * self.ne][1::2].tolist()
-                    layers[ilay * 2][iis:iis + 2 * self.ne][0::2] *= 0.  # check
-                    layers[ilay * 2][iis:iis + 2 * self.ne][1::2] *= 0.
-                    nears[iif].append(fars[iif][-1])
-                    fars[iif] = [nears[iif][0]] + fars[iif]
-                    # bottom
-                    bnears[iif] = layers[ilay * 2 + 1][iis:iis + 2 * self.ne][0::2].tolist()
-                    bfars[iif] = layers[ilay * 2 + 1][iis:iis + 2 * self.ne][1::2].tolist()
-                    layers[ilay * 2 + 1][iis:iis + 2 * self.ne][0::2] *= 0.
-                    layers[ilay * 2 + 1][iis:iis + 2 * self.ne][1::2] *= 0.
-                    bnears[iif].append(bfars[iif][-1])
-                    bfars[iif] = [bnears[iif][0]] + bfars[iif]
-                    #
-                    iis += 2 * self.ne
-
-                self.ZZT[ilay][:, iin] = nears[0]
-                self.ZZB[ilay][:, iin] = bnears[0]
-                # NaN mask for visualizing, but can be sort of a pain to deal with
-                # imask = np.nonzero( 1-self.ActiveCells[:,iin,ilay] )
-                # self.ZZT[ilay][:,iin][1::][imask] = np.nan
-                # self.ZZB[ilay][:,iin][1::][imask] = np.nan
-                # if self.ActiveCells[0,iin,ilay] == 0:
-                # self.ZZT[ilay][:,iin][0]  = np.nan
-                # self.ZZB[ilay][:,iin][0]  = np.nan
-                if iin == self.nn - 1:
-                    self.ZZT[ilay][:, iin + 1] = fars[1]
-                    self.ZZB[ilay][:, iin + 1] = bfars[1]
-                    # NaN mask
-                    # self.ZZT[ilay][:,iin+1][1::][imask] = np.nan
-                    # self.ZZB[ilay][:,iin+1][1::][imask] = np.nan
-                    # if self.ActiveCells[0,iin,ilay] == 0:
-                    #    self.ZZT[ilay][:,iin+1][0]  = np.nan
-                    #    self.ZZB[ilay][:,iin+1][0]  = np.nan
-
-        print ("Layers ||", np.linalg.norm(layers), "||")
-        # exit()
+        self.buildNodeDepths(Z)
+        if self.pointType != np.float64:
+            # compact mode, ZCORN is held as CornerDepths only
+            self.zcorn = None
 
         # visualize
         if plot:
@@ -565,23 +1011,29 @@ class GRDECL(FlowGrid):
             plt.savefig("mesh.png")
             plt.show()
 
+        return self.CornerDepths
+
+    def buildNodeDepths(self, Z):
+        """ Sets ZZ, the node depths of the top and bottom surface of each layer,
+            (nz, 2, ndx, ndy), from Z, the ZCORN depths as (nz, 2, nn, 2, ne, 2).
+            A node takes the SW corner of the cell to its NE, except along the
+            east and north edges where no such cell exists.
+        """
+        self.ZZ = np.empty((self.nz, 2, self.ndx, self.ndy), dtype=self.pointType)
+        self.ZZ[:, :, :-1, :-1] = Z[:, :, :, 0, :, 0].transpose(0, 1, 3, 2)
+        self.ZZ[:, :, -1, :-1] = Z[:, :, :, 0, -1, 1]
+        self.ZZ[:, :, 0, -1] = Z[:, :, -1, 1, 0, 0]
+        self.ZZ[:, :, 1:, -1] = Z[:, :, -1, 1, :, 1]
+        self.ZZT = self.ZZ[:, 0]  # zztop ha ha...two year's later this is still funny -TI
+        self.ZZB = self.ZZ[:, 1]
+
     def buildActiveCells(self, plot=False):
 
         print("Constructing active cells")
-        self.ActiveCells = np.zeros((self.ne * self.nn * self.nz), dtype=int)
-
-        count = 0
-        for item in self.active:
-            if "*" in item:
-                ct = (int)(item.split("*")[0])
-                vl = (int)(item.split("*")[1])
-                self.ActiveCells[count:count + ct] = vl
-                count += ct
-            else:
-                self.ActiveCells[count] = (int)(item)
-                count += 1
-
+        self.ActiveCells = castValues(self.active, MASK_TYPE, self.ne * self.nn * self.nz)
         self.ActiveCells = np.reshape(self.ActiveCells, (self.ne, self.nn, self.nz), order="F")
+        # ACTNUM as read is not kept next to the mask
+        self.active = np.ravel(self.ActiveCells, order="F")
 
         if plot:
             plt.pcolor(self.X0.T, self.Y0.T, self.ActiveCells[:, :, 0].T, edgecolors='w', linewidths=.1)
@@ -593,96 +1045,134 @@ class GRDECL(FlowGrid):
             plt.gca().xaxis.set_label_position("top")
             plt.show()
 
-    def calculateVolumes(self, plot=False):
-        # Iterate over cells, assert that we are dealing with parallelpiped, if so
-        #             | u1    u2   u3 |
-        #    A = det  | v1    v2   v3 |
-        #             | w1    w2   w3 |
-        # self.Volumes = 10000*np.random.normal(0,1, (self.ne, self.nn, self.nz) )
-        self.Volumes = np.zeros((self.ne, self.nn, self.nz))
-        for iiz in range(self.nz):
-            for iie in range(self.ne):
-                for iin in range(self.nn):
+    def calculateVolumes(self, plot=False, porosity="PORO"):
+        """ Calculates the volume of every cell in m^3, from the pillars and the
+            corner depths of buildZGrid. Cells are split into tetrahedra, so faces
+            do not need to be planar.
+            porosity = name of the porosity property, if it has been read with
+                       readProperty the pore volumes are calculated as well
+            Sets Volumes, ValidCells (False for cells with missing or collapsed
+            corners, these have a volume of 0) and PoreVolumes. Active-cells-only
+            grids (see keepActiveCells) get the values of their active cells.
+        """
+        if self.GridType in ("vtkRectilinearGrid", "vtkImageData"):
+            # cells of an implicit grid are boxes
+            dx, dy, dz = [np.abs(np.diff(a)) * f2m for a in self.gridAxes()]
+            self.Volumes = dx[:, None, None] * dy[None, :, None] * dz[None, None, :]
+            self.ValidCells = self.Volumes > 0
+        elif getattr(self, "CornerDepths", None) is not None:
+            self.Volumes, self.ValidCells = cellVolumes(self.coords, self.CornerDepths, scale=f2m)
+        else:
+            raise ValueError("Implicit grids keep no corner depths, calculate volumes before keepActiveCells")
+        if self.GlobalIndex is not None:
+            self.Volumes = self.cellValues(self.Volumes)
+            self.ValidCells = np.ravel(self.ValidCells, order="F")[self.GlobalIndex]
+        active = np.reshape(self.activeMask(), self.Volumes.shape, order="F") != 0
+        nbad = np.count_nonzero(~self.ValidCells & active)
+        if nbad:
+            print("Warning: " + str(nbad) + " active cells have an invalid geometry")
+
+        self.PoreVolumes = None
+        if porosity in self.Prop:
+            self.PoreVolumes = self.Volumes * self.Prop[porosity]
+            print("Total pore volume: " + str(np.sum(self.PoreVolumes[active])) + " m^3")
+
+        print("Total grid volume: " + str(np.sum(self.Volumes[active])) + " m^3")
+        return self.Volumes
 
-                    if self.ActiveCells[iie, iin, iiz]:
+    def readProperty(self, fname, attr_name):
+        """ Reads a single property from a file, for time series or multiple properties
+            you need to build on this
+        """
+        def read():
+            # the property is the first keyword in the file, only its block is converted
+            with KeywordFile(fname) as kf:
+                return kf.read(next(iter(kf)), size=self.ne * self.nn * self.nz).astype(float, copy=False)
 
-                        u = np.array((self.X0[iie, iin], self.Y0[iie, iin], self.ZZT[iiz][iie, iin])) - \
-                            np.array((self.X0[iie + 1, iin], self.Y0[iie + 1, iin], self.ZZT[iiz][iie, iin]))
+        data = self.cachedArray([fname], "GRDECL.readProperty %i %i %i" % (self.ne, self.nn, self.nz), read)
+        data = self.cellValues(data, (self.ne, self.nn, self.nz))
+        self.Prop[attr_name] = data
 
-                        v = np.array((self.X0[iie, iin], self.Y0[iie, iin], self.ZZT[iiz][iie, iin])) - \
-                            np.array((self.X0[iie, iin + 1], self.Y0[iie, iin + 1], self.ZZT[iiz][iie, iin]))
+        # Add to VTK grid
+        self.addArray(data, attr_name)
 
-                        w = np.array((self.X0[iie, iin], self.Y0[iie, iin], self.ZZT[iiz][iie, iin])) - \
-                            np.array((self.X0[iie, iin], self.Y0[iie, iin], self.ZZB[iiz][iie, iin]))
-                        if np.any(u != u) or np.any(v != v) or np.any(w != w):
-                            print("NAN!", iie, iin, iiz)
-                            exit()
-                        V = np.linalg.det(np.array((f2m * u, f2m * v, f2m * w)))
-                        self.Volumes[iie, iin, iiz] = np.abs(V)  # in m^3
 
-        vr = ((3. / (4. * np.pi)) * self.Volumes) ** (1. / 3.)  # virtual radius, taking into account porosity
+class EGRID(GRDECL):
+    """ EGRID processes the binary (unformatted) ECLIPSE output files, the grid
+        geometry from .EGRID and cell properties from .INIT and .UNRST
+    """
 
-        print("Total grid volume: " + str(np.sum(self.Volumes)) + " m^3")
+    def __init__(self):
+        super(EGRID, self).__init__()
 
-    def readProperty(self, fname, attr_name):
-        """ Reads a single property from a file, for time series or multiple properties
-            you need to build on this
+    def loadNodes(self, fname, rectilinear=False, tolerance=TOLERANCE, activeOnly=False):
+        """ Reads the corner point geometry from an .EGRID file and builds the same
+            grid as GRDECL.loadNodes does for ASCII input
         """
-        temp = []
-        with open(fname, "r") as fp:
-            for line in fp:
-                item = line.split()
-                if len(item) > 0:
-                    if item[0] != "--":
-                        tag = item[0]
-                        break
+        keywords = readBinaryKeywords(fname, ("GRIDHEAD", "COORD", "ZCORN", "ACTNUM"))
+        self.SPECGRID = np.array(keywords["GRIDHEAD"][1:4], dtype=int)
+        ne, nn, nz = self.SPECGRID
+        self.coords = keywords["COORD"].astype(float)
+        self.zcorn = keywords["ZCORN"].astype(float)
+        if "ACTNUM" in keywords:
+            self.active = keywords["ACTNUM"].astype(int)
+        else:
+            self.active = np.ones(ne * nn * nz, dtype=int)
 
-            for line in fp:
-                attribute = line.split()
-                if attribute:
-                    if attribute[0] != "--":
-                        if attribute[-1] != "/":
-                            temp += attribute
-                        else:
-                            attribute.pop()
-                            temp += attribute
-                            break
-
-                        # #attribute = fp.readline().split()[-1]
-                        # attribute = fp.readline().split()
-                        # print(attribute)
-                        # if attribute[0] != "--":
-                        #     self.Prop[tag] = attribute
-                        # print("loading", attribute)
-                        # for line in fp:
-                        #     if line.split():
-                        #         if line.split()[0] != "--":
-                        #             if line.split()[-1] != "/":
-                        #                 temp += line.split()
-                        #             else:
-                        #                 temp += line.split()[0:-1]
-                        #                 break
-        print(temp)
-        data = np.zeros((self.ne * self.nn * self.nz), dtype=float)
-        count = 0
-        for item in temp:
-            if "*" in item:
-                ct = (int)(item.split("*")[0])
-                vl = (float)(item.split("*")[1])
-                data[count:count + ct] = vl
-                count += ct
-            else:
-                data[count] = (float)(item)
-                count += 1
+        self.ne = self.SPECGRID[0]  # x  i
+        self.nn = self.SPECGRID[1]  # y  j
+        self.nz = self.SPECGRID[2]  # z  k
 
-        data = np.reshape(data, (self.ne, self.nn, self.nz), order="F")
+        self.buildGeometry(rectilinear, tolerance)
+        if activeOnly:
+            self.keepActiveCells()
 
-        # Add to VTK grid
-        ac = vtk.vtkDoubleArray()
-        ac.SetName(attr_name)
-        for iac in data.flatten(order='F'):
-            ac.InsertNextTuple1(iac)
-        self.Grid.GetCellData().AddArray(ac)
+    def toGlobal(self, keyword, values):
+        """ .INIT and .UNRST arrays usually only hold the active cells, scatter
+            those onto the full grid (inactive cells are 0). Active-cells-only grids
+            take them as they are, ECLIPSE orders active cells like GlobalIndex.
+        """
+        ncells = self.ne * self.nn * self.nz
+        if self.GlobalIndex is not None and len(values) == len(self.GlobalIndex):
+            return values.astype(self.propertyType)
+        if len(values) == ncells:
+            return values.astype(self.propertyType)
+        active = self.activeMask() != 0
+        if len(values) != np.count_nonzero(active):
+            raise ValueError("%s holds %i values, grid has %i cells and %i active cells" %
+                             (keyword, len(values), ncells, np.count_nonzero(active)))
+        data = np.zeros(ncells, dtype=self.propertyType)
+        data[active] = values
+        return data
+
+    def readProperty(self, fname, attr_name, keyword=None):
+        """ Reads a static cell property, e.g. PORO or PERMX, from an .INIT file
+            attr_name = name of the property in Prop and of the VTK array
+            keyword = ECLIPSE keyword of the property, default is attr_name
+        """
+        keyword = keyword or attr_name
+        keywords = readBinaryKeywords(fname, (keyword,))
+        if keyword not in keywords:
+            raise KeyError("%s not found in %s" % (keyword, fname))
+        data = self.cellValues(self.toGlobal(keyword, keywords[keyword]), (self.ne, self.nn, self.nz))
+        self.Prop[attr_name] = data
+
+        self.addArray(data, attr_name)
+        return data
+
+    def readRestart(self, fname, keyword, attr_title=None):
+        """ Reads a dynamic cell property, e.g. PRESSURE or SWAT, for every report
+            step of a unified restart file (.UNRST). Arrays are named
+            attr_title[step], like CMG.readOutputProperty does.
+        """
+        attr_title = attr_title or keyword
+        step = None
+        for kw, values in readRecords(fname, ("SEQNUM", keyword)):
+            if kw == "SEQNUM":
+                step = str(values[0])
+                continue
+            data = self.cellValues(self.toGlobal(keyword, values))
+            self.addArray(data, attr_title + '[' + step + ']')
 
 
 class SUTRA(FlowGrid):
@@ -702,12 +1192,14 @@ class SUTRA(FlowGrid):
             ve = vertical exaggeration, default is 1 (none)
             This method results in the generation of a VtkStructuredGrid
         """
+        tag = "SUTRA.loadNodes %i %i %i %r" % (nx, ny, nz, ve)
+        if self.loadCached([fname], tag):
+            return
         self.nx = nx
         self.ny = ny
         self.nz = nz
 
-        self.ActiveCells = np.ones((self.nx * self.ny * self.nz), dtype=int)
-
+        # SUTRA grids have no inactive cells, ActiveCells stays None (see activeMask)
         X = np.loadtxt(fname, comments="#")
         self.points = np.reshape(np.array((X[:, 2], X[:, 3], X[:, 4])).T, (nx, ny, nz, 3))
 
@@ -715,14 +1207,10 @@ class SUTRA(FlowGrid):
         self.GridType = "vtkStructuredGrid"
         self.Grid = vtk.vtkStructuredGrid()
         self.Grid.SetDimensions(nx, ny, nz)
-        vtk_points = vtk.vtkPoints()
-        for iz in range(nz):
-            for iy in range(ny):
-                for ix in range(nx):
-                    vtk_points.InsertNextPoint(self.points[ix, iy, iz][0], \
-                                               self.points[ix, iy, iz][1], \
-                                               ve * self.points[ix, iy, iz][2])
-        self.Grid.SetPoints(vtk_points)
+        # VTK runs through x first, then y and z
+        points = self.points.transpose(2, 1, 0, 3) * np.array((1., 1., ve))
+        self.Grid.SetPoints(self.buildPoints(points))
+        self.storeCached([fname], tag, ("nx", "ny", "nz", "points"))
 
     def loadNodesConnections(self, nodes, connections):
         """ In contrast to the above method, the points and connections can be loaded instead.
@@ -731,26 +1219,26 @@ class SUTRA(FlowGrid):
             nodes = node file, often called nodewise
             connections = element connections, often called incident
         """
+        if self.loadCached([nodes, connections], "SUTRA.loadNodesConnections"):
+            return
         X = np.loadtxt(nodes, comments="#")
-        #                   x       y       z
-        points = np.array((X[:, 2], X[:, 3], X[:, 4])).T
+        #       x, y, z
+        points = X[:, 2:5]
 
         self.GridType = "vtkUnstructuredGrid"
         self.Grid = vtk.vtkUnstructuredGrid()
-        vtk_points = vtk.vtkPoints()
-
-        for point in range(np.shape(points)[0]):
-            vtk_points.InsertNextPoint(points[point, 0], points[point, 1], points[point, 2])
-        self.Grid.SetPoints(vtk_points)
+        self.Grid.SetPoints(self.buildPoints(points))
 
         # Read in the connections, the format is as follows
         #  nodeid    p0, p1, p2, p3, p4, p5, p6, p7, p8
-        C = np.loadtxt(connections, comments="#", skiprows=2, dtype=int)
-        for line in range(np.shape(C)[0]):
-            idList = vtk.vtkIdList()
-            for node in C[line, :][1:]:
-                idList.InsertNextId(node - 1)
-            self.Grid.InsertNextCell(vtk.VTK_HEXAHEDRON, idList)
+        C = np.loadtxt(connections, comments="#", skiprows=2, dtype=ID_TYPE, ndmin=2)
+        # drop the element ids and shift the node ids to zero-based
+        connectivity = np.ascontiguousarray(C[:, 1:] - 1).ravel()
+        offsets = np.arange(0, len(connectivity) + 1, C.shape[1] - 1, dtype=ID_TYPE)
+        cells = vtk.vtkCellArray()
+        cells.SetData(numpy_to_vtkIdTypeArray(offsets, deep=True), numpy_to_vtkIdTypeArray(connectivity, deep=True))
+        self.Grid.SetCells(vtk.VTK_HEXAHEDRON, cells)
+        self.storeCached([nodes, connections], "SUTRA.loadNodesConnections", ())
 
     def readPermeability(self, fname, label=("$\kappa_x$", "$\kappa_y$", "$\kappa_z$")):
         """ Reads in SUTRA permeability data
@@ -761,19 +1249,9 @@ class SUTRA(FlowGrid):
             # Sutra and VTK use opposite ordering
             k = np.reshape(k, (self.nx - 1, self.ny - 1, self.nz - 1, np.shape(k)[1]))
             k = np.reshape(k, (nr, nc), order='F')
-        kx = vtk.vtkDoubleArray()
-        kx.SetName(label[0])
-        ky = vtk.vtkDoubleArray()
-        ky.SetName(label[1])
-        kz = vtk.vtkDoubleArray()
-        kz.SetName(label[2])
-        for ik, K in enumerate(k):
-            kx.InsertNextTuple1(K[2])
-            ky.InsertNextTuple1(K[3])
-            kz.InsertNextTuple1(K[4])
-        self.Grid.GetCellData().AddArray(kx)
-        self.Grid.GetCellData().AddArray(ky)
-        self.Grid.GetCellData().AddArray(kz)
+        self.addArray(k[:, 2], label[0])
+        self.addArray(k[:, 3], label[1])
+        self.addArray(k[:, 4], label[2])
 
     def readPorosity(self, fname, label="phi"):  # LaTeX tags work too: $\phi$
         phi = np.loadtxt(fname)
@@ -782,35 +1260,19 @@ class SUTRA(FlowGrid):
             # Sutra and VTK use opposite ordering
             phi = np.reshape(phi, (self.nx, self.ny, self.nz, np.shape(phi)[1]))
             phi = np.reshape(phi, (nr, nc), order='F')
-        vphi = vtk.vtkDoubleArray()
-        vphi.SetName(label)
-        for ik, K in enumerate(phi):
-            vphi.InsertNextTuple1(K[5])
-        self.Grid.GetPointData().AddArray(vphi)
+        self.addArray(phi[:, 5], label, point=True)
 
     def readPressure(self, fname, ts=2, label="$P$"):
         nnodes = self.nx * self.ny * self.nz
+        # pressure and concentration are columns of the same nodewise output
         P = np.loadtxt(fname, comments="#")[ts * nnodes:(ts + 1) * nnodes, :]
-        C = np.loadtxt(fname, comments="#")[ts * nnodes:(ts + 1) * nnodes, :]
         nr, nc = np.shape(P)
         if self.GridType == "vtkStructuredGrid":
             # Sutra and VTK use opposite ordering
             P = np.reshape(P, (self.nx, self.ny, self.nz, np.shape(P)[1]))
             P = np.reshape(P, (nr, nc), order='F')
-            C = np.reshape(C, (self.nx, self.ny, self.nz, np.shape(C)[1]))
-            C = np.reshape(C, (nr, nc), order='F')
-        vP = vtk.vtkDoubleArray()
-        vP.SetName(label)
-
-        vC = vtk.vtkDoubleArray()
-        vC.SetName("Concentration")
-
-        for ik in range(nnodes):
-            vP.InsertNextTuple1(P[ik, 3])
-            vC.InsertNextTuple1(C[ik, 4])
-            # vP.InsertNextTuple1( P[2*nnodes+ik, 3] )a
-        self.Grid.GetPointData().AddArray(vP)
-        self.Grid.GetPointData().AddArray(vC)
+        self.addArray(P[:, 3], label, point=True)
+        self.addArray(P[:, 4], "Concentration", point=True)
 
 
 # ========================================
@@ -822,117 +1284,74 @@ class CMG(FlowGrid):
     def __init__(self):
         super(CMG, self).__init__()
         nx, ny, nz = 0, 0, 0
+        self.datFiles = {}
 
     # Builds a corner point grid from a  CMG formatted input file (.dat)
     # CMG output files (.out) do not always contain complete CP grid information
-    def buildCorner(self, fname):
-        self.iWidths = []
-        self.jWidths = []
-        with open(fname, "r") as fp:
-
-            # TODO: the way that keywords are read in currently depends on their
-            # TODO: ordering in the input file - look for ** keyword to denote section ends?
-            # Read header
-            for line in fp:
-                item = line.split()
-                if len(item) > 0:
-                    # Searches for line of format *GRID *CORNER I J K
-                    if item[0] == "GRID" or item[0] == "*GRID":
-                        self.gridType = item[1]
-                        # i,j,k
-                        self.size = np.array(item[2:5], dtype=int)
-                        break
-
-            # We assume that DI comes before DJ in CMG file
-            # Read DI
-            count = 0
-            for line in fp:
-                item = line.split()
-                if item[0] == "DI" or item[0] == "*DI":
-                    if item[1] == "IVAR" or item[1] == "*IVAR":
-                        self.iWidths += item[2:]
-                        count += len(item) - 2
-                        break
-                    # Haven't added support for this yet
-                    elif item[1] == "CON":
-                        pass
-            for line in fp:
-                item = line.split()
-                for zz in item:
-                    if "*" in zz:
-                        item = zz.split("*")
-                        for i in range(0, int(item[0])):
-                            self.iWidths.append(item[1])
-                            count += 1
-                    else:
-                        self.iWidths.append(zz)
-                        count += 1
-                # If true, all attributes have been read
-                if count == self.size[0]:
-                    break
-
-            # Read DJ
-            count = 0
-            for line in fp:
-                item = line.split()
-                if item[0] == "DJ" or item[0] == "*DJ":
-                    if item[1] == "JVAR" or item[1] == "*JVAR":
-                        self.jWidths += item[2:]
-                        count += len(item) - 2
-                        break
-                    elif item[1] == "CON":
-                        pass
-            for line in fp:
-                item = line.split()
-                for zz in item:
-                    if "*" in zz:
-                        item = zz.split("*")
-                        for i in range(0, int(item[0])):
-                            self.jWidths.append(item[1])
-                            count += 1
-                    else:
-                        self.jWidths.append(zz)
-                        count += 1
-                # If true, all attributes have been read
-                if count == self.size[1]:
-                    break
-
-            def readDK():
-                pass
+    # The keywords (GRID, DI, DJ, ZCORN, NULL) are read from the keyword index, in any order
+    # With rectilinear set and layers that are flat within tolerance (a fraction of the
+    # depth range) the grid is only held as its axes, as image data or a rectilinear grid,
+    # by default the vtkStructuredGrid is kept
+    # With activeOnly set NULL cells are dropped, see keepActiveCells
+    def buildCorner(self, fname, rectilinear=False, tolerance=TOLERANCE, activeOnly=False):
+        tag = "CMG.buildCorner %s %g" % (rectilinear, tolerance)
+        if self.loadCached([fname], tag):
+            if activeOnly:
+                self.keepActiveCells()
+            return
+        dat = self.datFile(fname)
+
+        # *GRID *CORNER I J K
+        modifiers, size = dat.read("GRID", dtype=int)
+        self.gridType = modifiers[0]
+        self.size = size[0:3]
+
+        self.iWidths = self.readWidths(dat, "DI", self.size[0])
+        self.jWidths = self.readWidths(dat, "DJ", self.size[1])
+
+        ncells = self.size[0] * self.size[1] * self.size[2]
+        zcorn = dat.read("ZCORN", 8 * ncells)[1]
+        Z = layerAxis(zcorn, self.size[0], self.size[1], self.size[2], tolerance) if rectilinear else None
+        if Z is None:
+            self.calcCoords(zcorn)
+        else:
+            print("Rectilinear geometry, keeping the axes only")
+            self.buildAxesGrid(*(self.widthAxes() + (Z,)))
 
-            for line in fp:
-                item = line.split()
-                if item[0] == "ZCORN" or item[0] == "*ZCORN":
-                    break
-            self.calcCoords(fp)
-
-            # # Read COORD
-            # for line in fp:
-            #     item = line.split()
-            #     if item[0] == '*COORD':
-            #         break
-            # for line in fp:
-            #     item = line.split()
-            #     if item[0][:1] == "**":
-            #         continue
-
-            # Read NULL
-            for line in fp:
-                item = line.split()
-                # Assumes NULL keyword followed by ALL
-                if item[0] == "NULL" or item[0] == "*NULL":
-                    break
-            self.buildActiveCells(fp)
+        # Without NULL every cell is active
+        if "NULL" in dat:
+            self.buildActiveCells(dat.read("NULL", ncells, dtype=int)[1])
+        else:
+            self.buildActiveCells(np.ones(ncells, dtype=int))
 
         # Add in active cells
-        ac = vtk.vtkIntArray()
-        ac.SetName("ActiveCells")
-        for iac in self.ActiveCells.flatten(order='F'):
-            ac.InsertNextTuple1(iac)
-        self.Grid.GetCellData().AddArray(ac)
+        self.addArray(self.ActiveCells, "ActiveCells")
+        self.storeCached([fname], tag, ("gridType", "size", "iWidths", "jWidths", "ActiveCells"))
+        if activeOnly:
+            self.keepActiveCells()
+
+    # Keyword index of a .dat file, built once per file
+    def datFile(self, fname):
+        if fname not in self.datFiles:
+            self.datFiles[fname] = DatFile(fname)
+        return self.datFiles[fname]
+
+    # Reads cell widths given as *IVAR/*JVAR lists or as a *CON constant
+    def readWidths(self, dat, keyword, count):
+        modifiers, values = dat.read(keyword)
+        if modifiers and keywordName(modifiers[0]) == "CON":
+            return np.full(count, values[0])
+        if len(values) != count:
+            raise ValueError("%s holds %i values, expected %i" % (keyword, len(values), count))
+        return values
 
     # Builds a cartesian grid from a CMG output file (.out)
-    def buildCart(self, fname):
+    def buildCart(self, fname, rectilinear=False):
+        """ Builds the grid of a *GRID *CART model with constant DI, DJ and DK.
+            rectilinear = only keep the X, Y and Z axes, as vtkImageData (the spacing is
+            constant) instead of a vtkStructuredGrid holding every vertex. Off by
+            default, like the rectilinear option of the corner point loaders.
+        """
         self.iWidths = []
         self.jWidths = []
         with open(fname, "r") as fp:
@@ -955,11 +1374,11 @@ class CMG(FlowGrid):
                 # Read DI
                 if item[0] == "DI" or item[0] == "*DI":
                     if item[1] == "CON" or item[1] == "*CON":
-                        self.X = np.arange(0, float(item[2]) * (self.size[0] + 1), float(item[2]))
+                        self.X = float(item[2]) * np.arange(self.size[0] + 1)
                 # Read DJ
                 elif item[0] == "DJ" or item[0] == "*DJ":
                     if item[1] == "CON" or item[1] == "*CON":
-                        self.Y = np.arange(0, float(item[2]) * (self.size[1] + 1), float(item[2]))
+                        self.Y = float(item[2]) * np.arange(self.size[1] + 1)
                 # Read DK
                 elif item[0] == "DK" or item[0] == "*DK":
                     if item[1] == "CON" or item[1] == "*CON":
@@ -967,341 +1386,142 @@ class CMG(FlowGrid):
                 # Read DEPTH (assumes of form *DEPTH *TOP I J K depth)
                 elif item[0] == "DEPTH" or item[0] == "*DEPTH":
                     depth = float(item[5])
-                    self.Z = np.arange(depth, depth - (kSpacing * self.size[2]), -kSpacing)
+                    self.Z = depth - kSpacing * np.arange(self.size[2] + 1)
                     break
 
-        # Write cell vertex coordinates
-        XX, YY, ZZ = ([] for el in range(3))
-        for k in range(self.size[2] + 1):
-            for j in range(self.size[1] + 1):
-                XX.extend(self.X)
-                YY.extend([self.Y[j]] * (self.size[0] + 1))
-            ZZ.extend([self.Z[k]] * (self.size[0] + 1) * (self.size[1] + 1))
+        if rectilinear:
+            self.buildAxesGrid(self.X, self.Y, self.Z)
+            return
 
-        # Convert to vtk grid
+        # Convert to vtk grid, x runs fastest, then y and z
         self.GridType = "vtkStructuredGrid"
         self.Grid = vtk.vtkStructuredGrid()
         self.Grid.SetDimensions(self.size[0] + 1, self.size[1] + 1, self.size[2] + 1)
-        vtk_points = vtk.vtkPoints()
-        for point in range(len(XX)):
-            vtk_points.InsertNextPoint(XX[point], YY[point], ZZ[point])
-        self.Grid.SetPoints(vtk_points)
+        self.Grid.SetPoints(self.buildPoints(axesPoints(self.X, self.Y, self.Z)))
 
     # Helps buildCorner in constructing cell vertex coordinates
-    def calcCoords(self, fp):
-        # -Convert CMG DI,DJ cell width data to x,y coordinate lists
-        # -Write coordinate lists following ZCORN ordering
-        # -There will be many duplicated points at this step, since
-        #  grid blocks may share corners
-
-        def writeCorners():
-            x1 = 0
-            x2 = 0
-            for i in range(self.size[0]):
-                x2 = x1 + float(self.iWidths[i])
-                X.extend([x1, x2])
-                Y.extend([y, y])
-                x1 = x2
-
-        def writeCoords(coord):
-            XX.append(X[coord])
-            YY.append(Y[coord])
-            ZZ.append(Z[coord])
-
-        def buildLayer():
-            for j in range(self.size[1]):
-                for i in range(self.size[0]):
-                    # write NW corner
-                    if i == 0:
-                        nwCoord = 2 * i + 4 * self.size[0] * j + const
-                        writeCoords(nwCoord)
-                    # write NE corner
-                    neCoord = 2 * i + 4 * self.size[0] * j + const + 1
-                    writeCoords(neCoord)
-                if j == self.size[1] - 1:
-                    for i in range(self.size[0]):
-                        # write SW corner
-                        if i == 0:
-                            swCoord = 2 * i + 4 * self.size[0] * j + 2 * self.size[0] + const
-                            writeCoords(swCoord)
-                        # write SE corner
-                        seCoord = 2 * i + 4 * self.size[0] * j + 2 * self.size[0] + const + 1
-                        writeCoords(seCoord)
-
-        X, Y, Z, XX, YY, ZZ = ([] for i in range(6))
-        # Write corner x,y coordinates for top, then bottom of entire i,j cell layer
-        for layer in range(2):
-            for k in range(self.size[2]):
-                y = 0
-                for j in range(self.size[1]):
-                    # NW-T and NE-T corners
-                    writeCorners()
-                    y += float(self.jWidths[j])
-                    # SW-T and SE-T corners
-                    writeCorners()
-
-        # Write z-coordinates from ZCORN
-        # TODO: make this consistent with Trevor's style of doing these operations
-        for line in fp:
-            item = line.split()
-            if item[0][0] != "*":
-                for zz in item:
-                    if "*" in zz:
-                        item = zz.split("*")
-                        for i in range(0, int(item[0])):
-                            Z.append(float(item[1]))
-                    else:
-                        Z.append(float(zz))
-            else:
-                break
+    # zcorn holds the ZCORN values
+    # -x,y node coordinates are the cumulative DI,DJ cell widths
+    # -A node takes its depth from one of the cells it is a corner of: in I the cell to
+    #  its west (the first column the cell to its east), in J the cell to its north (the
+    #  last row the cell to its south) and in K the layer below (the bottom surface the
+    #  last layer)
+    # Vertex X and Y of the columns and rows, from the cell widths
+    def widthAxes(self):
+        X = np.concatenate(([0.], np.cumsum(self.iWidths, dtype=float)))
+        Y = np.concatenate(([0.], np.cumsum(self.jWidths, dtype=float)))
+        return X, Y
+
+    def calcCoords(self, zcorn):
+        ni, nj, nk = self.size
+        X, Y = self.widthAxes()
+
+        # ZCORN runs through the W/E corner, I, the S/N face, J, top/bottom and then K
+        Z = np.reshape(zcorn, (nk, 2, nj, 2, ni, 2))
+        # layer tops and the bottom of the last layer, (nk+1, nj, 2, ni, 2)
+        surfaces = np.concatenate((Z[:, 0], Z[-1:, 1]))
+        # first face of every row and the second face of the last, (nk+1, nj+1, ni, 2)
+        rows = np.concatenate((surfaces[:, :, 0], surfaces[:, -1:, 1]), axis=1)
+        # first corner of the first column and the second corner of every column
+        ZZ = np.concatenate((rows[:, :, :1, 0], rows[:, :, :, 1]), axis=2)
+
+        # x runs fastest, then y and z
+        points = np.empty(ZZ.shape + (3,))
+        points[..., 0] = X[None, None, :]
+        points[..., 1] = Y[None, :, None]
+        points[..., 2] = ZZ
 
         self.GridType = "vtkStructuredGrid"
         self.Grid = vtk.vtkStructuredGrid()
-        self.Grid.SetDimensions(self.size[0] + 1, self.size[1] + 1, self.size[2] + 1)
-        const = 0
-        for k in range(self.size[2]):
-            buildLayer()
-            if k == self.size[2] - 1:
-                const += self.size[0] * self.size[1] * 4
-                buildLayer()
-                break
-            else:
-                const += self.size[0] * self.size[1] * 8
+        self.Grid.SetDimensions(ni + 1, nj + 1, nk + 1)
+        self.Grid.SetPoints(self.buildPoints(points))
 
-        # vtk_points = pointsToVTK("./SACROC_CMG_VTK", Xtemp, Ytemp, Ztemp, data={"test": dat})
-        vtk_points = vtk.vtkPoints()
-        for point in range(len(XX)):
-            vtk_points.InsertNextPoint(XX[point], YY[point], ZZ[point])
-        self.Grid.SetPoints(vtk_points)
-
-    def buildActiveCells(self, fp):
-        self.ActiveCells = []
-        count = 0
-        for line in fp:
-            item = line.split()
-            for zz in item:
-                if "*" in zz:
-                    item = zz.split("*")
-                    for i in range(0, int(item[0])):
-                        self.ActiveCells.append(int(item[1]))
-                        count += 1
-                else:
-                    self.ActiveCells.append(int(zz))
-                    count += 1
-            if count == self.size[0] * self.size[1] * self.size[2]:
-                break
-        self.ActiveCells = np.array(self.ActiveCells)
+    def buildActiveCells(self, values):
+        self.ActiveCells = np.asarray(values).astype(MASK_TYPE, copy=False)
         self.ActiveCells = np.reshape(self.ActiveCells, (self.size[0], self.size[1], self.size[2]), order="F")
 
-    # 'stop' refers to the CMG keyword that signals the end
-    #  of the desired attribute property section
-    # 'stop' is required if 'ALL' keyword is present
+    # Reads a property from the keyword index of a .dat file, given as ALL, *CON or
+    # *EQUALSI (with an optional operation, e.g. *PERMK *EQUALSI * 0.1)
+    # Properties read are kept in self.Prop, so *EQUALSI uses the I array already read
+    # With a cache set, the converted property is taken from it while the file is unchanged
     def readProperty(self, fname, attr_name, add=True):
-        typeVal = None
-        val = 0
-        with open(fname, "r") as fp:
-            for line in fp:
-                item = line.split()
-                if len(item) > 0:
-                    if item[0] == attr_name:
-                        if len(item) >= 2:
-                            if item[1] == "*CON":
-                                val = float(item[2])
-                                typeVal = '*CON'
-                            elif item[1] == '*EQUALSI' or item[1] == 'EQUALSI':
-                                attr_I = attr_name[:-1] + 'I'
-                                # Change 'PERMJ' to be the keyword that identifies the end of attribute section
-                                data = self.readProperty(fname, attr_I, add=False)
-                                if len(item) == 4:
-                                    op = item[2]
-                                    if op == '*':
-                                        data *= float(item[3])
-                                    elif op == '/':
-                                        data /= float(item[3])
-                                    elif op == '+':
-                                        data += float(item[3])
-                                    elif op == '-':
-                                        data -= float(item[3])
-                            elif item[1] == 'ALL':
-                                typeVal = 'ALL'
-                        break
-
-            if typeVal == 'ALL':
-                data = []
-                count = 0
-                for line in fp:
-                    item = line.split()
-                    for attr in item:
-                        if "*" in attr:
-                            item = attr.split("*")
-                            for i in range(0, int(item[0])):
-                                data.append(float(item[1]))
-                                count += 1
-                        else:
-                            data.append(float(attr))
-                            count += 1
-                    # If true, all values have been read
-                    if count == self.size[0] * self.size[1] * self.size[2]:
-                        data = np.array(data)
-                        data = np.reshape(data, (self.size[0], self.size[1], self.size[2]), order="F")
-                        break
-            elif typeVal == '*CON':
-                data = np.full((self.size[0], self.size[1], self.size[2]), val)
+        data = self.cachedArray([fname], "CMG.readProperty " + attr_name,
+                                lambda: self.parseProperty(fname, attr_name))
+        data = self.cellValues(data)
+        self.Prop[attr_name] = data
 
         if add:
             self.addToGrid(data, attr_name)
         return data
 
+    # Converts the block of attr_name, see readProperty
+    def parseProperty(self, fname, attr_name):
+        shape = (self.size[0], self.size[1], self.size[2])
+        modifiers, values = self.datFile(fname).read(attr_name)
+        typeVal = keywordName(modifiers[0]) if modifiers else None
+        if typeVal == 'CON':
+            data = np.full(shape, values[0])
+        elif typeVal == 'EQUALSI':
+            attr_I = attr_name[:-1] + 'I'
+            if attr_I not in self.Prop:
+                self.readProperty(fname, attr_I, add=False)
+            if np.size(self.Prop[attr_I]) == np.prod(shape):
+                data = np.array(self.Prop[attr_I], dtype=float)
+            else:
+                # only the active cells are kept, see keepActiveCells
+                data = self.parseProperty(fname, attr_I)
+            if len(modifiers) == 2 and len(values) == 1:
+                op = modifiers[1]
+                if op == '*':
+                    data *= values[0]
+                elif op == '/':
+                    data /= values[0]
+                elif op == '+':
+                    data += values[0]
+                elif op == '-':
+                    data -= values[0]
+        elif typeVal == 'ALL':
+            if len(values) != np.prod(shape):
+                raise ValueError("%s holds %i values, expected %i" % (attr_name, len(values), np.prod(shape)))
+            data = np.reshape(values, shape, order="F")
+        else:
+            raise ValueError("%s %s is not supported" % (attr_name, " ".join(modifiers)))
+        return data
+
     # Add data to VTK grid
     def addToGrid(self, data, attr_name):
-        ac = vtk.vtkDoubleArray()
-        ac.SetName(attr_name)
-        for iac in data.flatten(order='F'):
-            ac.InsertNextTuple1(iac)
-        self.Grid.GetCellData().AddArray(ac)
-
-    # Populates entire K-layer with val (for reading .out property)
-    def buildConstLayer(self, val):
-        jKeys = np.arange(self.size[1])
-        kLayer = dict((el, []) for el in jKeys)
-        for j in range(self.size[1]):
-            iRow = []
-            for i in range(self.size[0]):
-                iRow.append(val)
-            kLayer[j] = iRow
-        return kLayer
+        self.addArray(data, attr_name)
 
     # -This builds a dictionary of a desired attribute for every timestep present in the .out file
     # -attr_name is the desired attribute as it appears in the .out file
-    # -If a cell property is empty, then this will set it to null
+    # -If a cell property is empty, then this will set it to NaN
     # -attr_title is how the attr will appear in the vts file
-    def readOutputProperty(self, fname, attr_name, attr_title):
-        # Set up dictionary for attr_name
-        # Doing so will allow us to read attr_name values for every time step
-        attr_name = attr_name.replace(" ", "").strip()
-        setattr(self, attr_name, {})
-        # self[attr_name] = {}
-        layers = {}
-        propIndices = []
-        I, J, K = (None,) * 3
-        time = None
-        build = False
-
-        with open(fname, "r") as fp:
-            for line in fp:
-                item = line.split()
-                if len(item) > 0:
-                    # Find current time step
-                    if item[0] == 'Time':
-                        time = item[2]
-                    attr = line.replace(" ", "").strip()
-                    # Locate attribute name
-                    if attr == attr_name:
-                        build = True
-                        layers = {}
-                        propIndices = []
-                        I = None
-                        J = None
-                        K = '1'
-
-                    if build:
-                        if item[0] == 'All':
-                            kKeys = np.arange(self.size[2])
-                            grid = dict((el, {}) for el in kKeys)
-                            for k in range(self.size[2]):
-                                kLayer = self.buildConstLayer(item[3])
-                                grid[k] = kLayer
-                            self[attr_name][time] = grid
-                            build = False
-                            continue
-
-                        if item[0] == 'Plane':
-                            K = item[3]
-                            if len(item) > 4:
-                                if item[4] == 'All':
-                                    kLayer = self.buildConstLayer(item[7])
-                                    layers[K] = kLayer
-                            else:
-                                I = None
-                                layers[K] = {}
-
-                        if item[0] == 'I':
-                            if K == '1' and I is None:
-                                layers[K] = {}
-                            J = None
-                            propIndices = []
-                            I = item[2:]
-                            prevDigit = False
-                            for i in range(len(line)):
-                                if line[i].isdigit():
-                                    if not prevDigit:
-                                        propIndices.append(i)
-                                        prevDigit = True
-                                else:
-                                    prevDigit = False
-
-                        # Check if there are any missing values in J line
-                        skipItem = []
-                        if item[0] == 'J=':
-                            JIndex = item[1]
-                            J = item[2:]
-
-                            if JIndex not in layers[K].keys():
-                                layers[K][JIndex] = []
-
-                            for i in range(len(propIndices)):
-                                if line[propIndices[i]] == ' ':
-                                    skipItem.append(i)
-
-                            numSkips = 0
-                            for i in range(len(I)):
-                                if i in skipItem:
-                                    layers[K][JIndex].append('NULL')
-                                    numSkips += 1
-                                else:
-                                    layers[K][JIndex].append(J[i - numSkips])
-
-                        # Put entire grid worth of property in dictionary for current time step
-                        if I and J:
-                            if int(I[-1]) == self.size[0] and int(JIndex) == self.size[1] and int(K) == self.size[2]:
-                                if build:
-                                    self[attr_name][time] = layers
-                                    layers = {}
-                                    build = False
-
-            # Convert layers from dictionary to arrays
+    # -times selects the timesteps, None for all, N for every Nth or a list of report times
+    def readOutputProperty(self, fname, attr_name, attr_title, times=None):
+        self.readOutputProperties(fname, {attr_name: attr_title}, times)
+
+    # -Reads several attributes at once, attrs is a dictionary of attr_name: attr_title
+    # -The .out file is scanned once for a byte offset index (kept next to it as fname.idx),
+    #  after that only the requested tables are read
+    def readOutputProperties(self, fname, attrs, times=None):
+        index = OutputIndex(fname)
+        for attr_name, attr_title in attrs.items():
             timeSeriesData = {}
-            for time in self[attr_name].keys():
-                timeSeriesData[time] = []
-                for k in self[attr_name][time].keys():
-                    for j in self[attr_name][time][k].keys():
-                        timeSeriesData[time] += self[attr_name][time][k][j]
-            setattr(self, attr_name, timeSeriesData)
-
-            # Add to VTK grid
-            n = 1
-            for key in self[attr_name].keys():
-                data = np.array(self[attr_name][key])
-                # data = np.reshape(data, (self.size[0], self.size[1], self.size[2]), order="F")
-
-                ac = vtk.vtkDoubleArray()
-                ac.SetName(attr_title + '[' + key + ']')
-
-                def isfloat(value):
-                    try:
-                        float(value)
-                        return True
-                    except ValueError:
-                        return False
-
-                for iac in data:
-                    if not iac[0].isdigit():
-                        iac = 0
-                    else:
-                        if isfloat(iac):
-                            iac = float(iac)
-                        else:
-                            iac = 0
-
-                    ac.InsertNextTuple1(iac)
-                self.Grid.GetCellData().AddArray(ac)
+            for time, start, end in index.select(attr_name, times):
+                timeSeriesData[time] = self.parseOutputBlock(index.read(start, end))
+                self.addArray(timeSeriesData[time], attr_title + '[' + time + ']')
+            setattr(self, normalizeTitle(attr_name), timeSeriesData)
+
+    # Reads the table of attr_name at a single timestep, without adding it to the grid
+    def readOutputArray(self, fname, attr_name, time):
+        index = OutputIndex(fname)
+        blocks = index.select(attr_name, [time])
+        if not blocks:
+            raise KeyError("%s at time %s is not in %s" % (attr_name, time, fname))
+        time, start, end = blocks[0]
+        return self.parseOutputBlock(index.read(start, end))
+
+    # Converts the table of one property at one timestep to an array in cell order
+    # Empty cells are set to NaN, active-cells-only grids keep their active cells
+    def parseOutputBlock(self, buf):
+        return self.cellValues(parseTable(buf, self.size[0], self.size[1], self.size[2]).ravel())
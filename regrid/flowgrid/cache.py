@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+
+# Bumped when the layout of the cached arrays changes, older entries are then never hit
+CACHEVERSION = 3
+
+# Default size limit of the cache directory
+MAXBYTES = 10 * 1024 ** 3
+
+
+
+class GridCache(object):
+    """ On-disk cache of parsed grids. Each entry is a directory of .npy files, one per
+        array, keyed by the path, size, mtime and ctime of the source files and a tag
+        naming the loader and its arguments. Source files are never read to check them,
+        unlike the mtime the ctime cannot be set back (os.utime), so an edit keeping the
+        size and mtime still gives a new key on POSIX systems. Arrays are memory-mapped
+        (copy on write) when loaded, so a hit costs about as much as an mmap. Entries
+        are evicted least recently used first once the cache grows past maxbytes.
+    """
+
+    def __init__(self, root=None, maxbytes=MAXBYTES):
+        """ root = cache directory, default is $REGRID_CACHE or ~/.cache/regrid
+            maxbytes = size limit of the cache directory
+        """
+        self.root = root or os.environ.get("REGRID_CACHE") or os.path.join(os.path.expanduser("~"), ".cache", "regrid")
+        self.maxbytes = maxbytes
+        os.makedirs(self.root, exist_ok=True)
+
+    def key(self, sources, tag):
+        """ Key of the entry for the source files (a sequence of file names) and tag,
+            from a stat of each file
+        """
+        h = hashlib.blake2b(digest_size=20)
+        h.update(("%i %s\n" % (CACHEVERSION, tag)).encode())
+        for fname in sources:
+            stat = os.stat(fname)
+            h.update(("%s %i %i %i\n" % (os.path.abspath(fname), stat.st_size, stat.st_mtime_ns,
+                                         stat.st_ctime_ns)).encode())
+        return h.hexdigest()
+
+    def load(self, key):
+        """ The dict of name -> array (or scalar) stored under key, None when there is
+            no entry
+        """
+        path = os.path.join(self.root, key)
+        try:
+            with open(os.path.join(path, "index.json"), "r") as fp:
+                index = json.load(fp)
+        except (OSError, ValueError):
+            return None
+        values = dict(index["scalars"])
+        for name, fname in index["arrays"].items():
+            values[name] = np.load(os.path.join(path, fname), mmap_mode="c")
+        # the mtime of an entry is its last use
+        os.utime(path)
+        return values
+
+    def store(self, key, values):
+        """ Stores a dict of name -> numpy array or scalar (str, int, float) under key
+            and evicts old entries if the cache has grown too large
+        """
+        path = os.path.join(self.root, key)
+        tmp = tempfile.mkdtemp(prefix=".tmp", dir=self.root)
+        index = {"scalars": {}, "arrays": {}}
+        for i, (name, value) in enumerate(values.items()):
+            if np.isscalar(value):
+                index["scalars"][name] = value.item() if isinstance(value, np.generic) else value
+            else:
+                fname = "%i.npy" % i
+                np.save(os.path.join(tmp, fname), np.asarray(value))
+                index["arrays"][name] = fname
+        with open(os.path.join(tmp, "index.json"), "w") as fp:
+            json.dump(index, fp)
+        try:
+            os.rename(tmp, path)
+        except OSError:
+            # stored in the meantime by another process
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict()
+
+    def entries(self):
+        """ (last use, bytes, path) of every entry
+        """
+        entries = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name.startswith(".") or not os.path.isdir(path):
+                continue
+            size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+            entries.append((os.path.getmtime(path), size, path))
+        return entries
+
+    def evict(self):
+        """ Removes the least recently used entries until the cache fits in maxbytes
+        """
+        entries = sorted(self.entries())
+        total = sum(size for used, size, path in entries)
+        for used, size, path in entries:
+            if total <= self.maxbytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        for used, size, path in self.entries():
+            shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,82 @@
+import mmap
+import re
+
+from regrid.flowgrid.eclascii import parseValues
+
+# CMG input files (.dat) start each keyword on its own line, with or without the
+# leading star, followed by its modifiers and values, e.g.
+#   *DI *IVAR
+#    120.0 4*100.0
+# ** starts a comment
+KEYWORD = re.compile(rb"^[ \t]*\*?([A-Za-z][A-Za-z0-9_]*)", re.M)
+COMMENT = re.compile(rb"\*\*[^\n]*")
+NUMBER = re.compile(rb"[-+]?\.?\d")
+
+
+def keywordName(keyword):
+    """ Keywords are matched without their star and in upper case
+    """
+    return keyword.lstrip("*").upper()
+
+
+class DatFile(object):
+    """ Keyword index over a CMG input file (.dat). The file is scanned once for the
+        byte range of every keyword, blocks are only converted when read, in any order.
+        Repeated keywords keep their first occurrence.
+    """
+
+    def __init__(self, fname, mapped=True):
+        """ fname = file name
+            mapped = memory-map the file instead of reading it into memory
+        """
+        with open(fname, "rb") as fp:
+            if mapped:
+                self.buf = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self.buf = fp.read()
+        self.blocks = {}
+        matches = list(KEYWORD.finditer(self.buf))
+        for im, match in enumerate(matches):
+            keyword = keywordName(match.group(1).decode())
+            end = matches[im + 1].start() if im + 1 < len(matches) else len(self.buf)
+            if keyword not in self.blocks:
+                self.blocks[keyword] = (match.end(), end)
+
+    def __contains__(self, keyword):
+        return keywordName(keyword) in self.blocks
+
+    def __iter__(self):
+        return iter(self.blocks)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        if isinstance(self.buf, mmap.mmap):
+            self.buf.close()
+
+    def read(self, keyword, count=None, dtype=float):
+        """ Converts the block of keyword.
+            returns (modifiers, values), modifiers are the non-numeric tokens following
+            the keyword on its line (e.g. *IVAR, ALL or *EQUALSI *), values the numbers
+            after them with N*value repeats expanded
+            count = expected number of values, a ValueError is raised if it differs
+        """
+        name = keywordName(keyword)
+        if name not in self.blocks:
+            raise KeyError("%s is not in the input file" % keyword)
+        start, end = self.blocks[name]
+        block = COMMENT.sub(b"", self.buf[start:end])
+        first, newline, rest = block.partition(b"\n")
+        tokens = first.split()
+        n = 0
+        while n < len(tokens) and not NUMBER.match(tokens[n]):
+            n += 1
+        modifiers = [t.decode() for t in tokens[:n]]
+        values = parseValues(b" ".join(tokens[n:]) + b"\n" + rest, dtype)
+        if count is not None and len(values) != count:
+            raise ValueError("%s holds %i values, expected %i" % (keyword, len(values), count))
+        return modifiers, values
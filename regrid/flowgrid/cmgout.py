@@ -0,0 +1,210 @@
+import json
+import os
+import re
+import numpy as np
+
+# CMG output files (.out) print grid properties as tables following a title line, e.g.
+#                         Pressure (psia)
+#   Plane K = 1
+#     I =          1         2         3
+#   J=  1     1308.799  1493.157  4071.314
+# or as constants: "All values are 0.25", "Plane K = 2  All values are 7.5"
+TABLE = (b"All ", b"Plane ", b"I ", b"I=", b"J=")
+
+# Column numbers of an "I =" header line
+NUMBER = re.compile(rb"\d+")
+
+# Report time following "Time ="
+TIME = re.compile(rb"[-+]?\.?\d")
+
+# Bumped when the layout of the index file changes
+INDEXVERSION = 2
+
+
+def normalizeTitle(title):
+    """ Titles are matched with their spaces removed
+    """
+    return title.replace(" ", "").strip()
+
+
+def scanOutput(fname):
+    """ Single pass over a CMG output file recording where the timesteps and
+        property tables are.
+        returns (times, blocks)
+        times = list of (time, offset) of every Time header
+        blocks = list of (title, time, start, end), buf[start:end] holds the table
+                 lines following the title, title with its spaces removed
+    """
+    times = []
+    blocks = []
+    time = None
+    title = None
+    start = None
+    offset = 0
+    with open(fname, "rb") as fp:
+        for line in fp:
+            s = line.lstrip()
+            if s.startswith(TABLE):
+                if start is None and title is not None:
+                    start = offset
+            elif s:
+                # any other text ends a table
+                if start is not None:
+                    blocks.append((title, time, start, offset))
+                    start = None
+                item = s.split()
+                # "Time = 10.0 ...", not "Timestep" or "Time step size 2.5"
+                if item[0] == b"Time" and len(item) > 2 and TIME.match(item[2]):
+                    time = item[2].decode()
+                    times.append((time, offset))
+                title = normalizeTitle(s.decode(errors="replace"))
+            offset += len(line)
+    if start is not None:
+        blocks.append((title, time, start, offset))
+    return times, blocks
+
+
+class OutputIndex(object):
+    """ Byte offset index of the timesteps and property tables of a CMG output file.
+        The index is kept in a sidecar file (fname + ".idx") and reused for as long
+        as the size and modification time of the output file are unchanged.
+    """
+
+    def __init__(self, fname, sidecar=True):
+        """ fname = CMG output file
+            sidecar = read and write the index file, False always scans
+        """
+        self.fname = fname
+        self.indexname = fname + ".idx"
+        stat = os.stat(fname)
+        self.stamp = [stat.st_size, stat.st_mtime]
+        index = self.load() if sidecar else None
+        if index is None:
+            self.times, self.blocks = scanOutput(fname)
+            if sidecar:
+                self.save()
+        else:
+            self.times = [tuple(t) for t in index["times"]]
+            self.blocks = [tuple(b) for b in index["blocks"]]
+
+    def load(self):
+        """ The stored index, None if it is missing or out of date
+        """
+        try:
+            with open(self.indexname, "r") as fp:
+                index = json.load(fp)
+        except (OSError, ValueError):
+            return None
+        if index.get("version") != INDEXVERSION or index.get("stamp") != self.stamp:
+            return None
+        return index
+
+    def save(self):
+        try:
+            with open(self.indexname, "w") as fp:
+                json.dump({"version": INDEXVERSION, "stamp": self.stamp,
+                           "times": self.times, "blocks": self.blocks}, fp)
+        except OSError:
+            # read-only location, the index is only kept in memory
+            pass
+
+    def selectTimes(self, times=None):
+        """ Timesteps to load
+            times = None for all, an int N for every Nth timestep or a list of report times
+        """
+        steps = [t for t, offset in self.times]
+        if times is None:
+            return steps
+        if isinstance(times, int):
+            return steps[::times]
+        wanted = set(float(t) for t in times)
+        return [t for t in steps if float(t) in wanted]
+
+    def select(self, attr_name, times=None):
+        """ (time, start, end) of the tables of attr_name at the chosen timesteps
+        """
+        title = normalizeTitle(attr_name)
+        blocks = [(time, start, end) for t, time, start, end in self.blocks if t == title]
+        if times is None:
+            return blocks
+        steps = set(self.selectTimes(times))
+        return [b for b in blocks if b[0] in steps]
+
+    def read(self, start, end):
+        """ Bytes of the table at buf[start:end]
+        """
+        with open(self.fname, "rb") as fp:
+            fp.seek(start)
+            return fp.read(end - start)
+
+
+def tableColumns(line):
+    """ Column layout of the J rows under an "I =" header line. Values are printed
+        roughly under the column numbers of the header, right aligned with them or
+        centred on them depending on the field width.
+        returns (icols, bounds), 0-based I of each column and the positions halfway
+        between neighbouring column numbers that separate the fields
+    """
+    numbers = list(NUMBER.finditer(line, line.index(b"=") + 1))
+    icols = np.array([int(m.group()) - 1 for m in numbers])
+    centres = np.array([(m.start() + m.end() - 1) / 2. for m in numbers])
+    return icols, (centres[1:] + centres[:-1]) / 2.
+
+
+def readRows(layer, rows, columns):
+    """ Converts a group of "J=" rows to floats and stores them in layer (nj, ni).
+        numpy reads all numbers of the group at once and finds where each of them
+        is printed, on the raw bytes. Each value goes to the column whose header
+        number is nearest, cells left empty in the table stay NaN.
+    """
+    icols, bounds = columns
+    # "J=" is blanked out in place, so the byte positions stay those of the table
+    text = b"\n".join(rows).replace(b"J=", b"  ")
+    numbers = np.fromstring(text, dtype=float, sep=" ")
+    chars = np.frombuffer(text, dtype=np.uint8)
+    edges = np.diff(np.concatenate(([0], (chars > 32).astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    if len(starts) != len(numbers):
+        raise ValueError("table rows hold non-numeric values")
+    # row of every number and its position within the row
+    newlines = np.flatnonzero(chars == ord("\n"))
+    row = np.searchsorted(newlines, starts)
+    centres = (starts + ends - 1) / 2. - np.concatenate(([0], newlines + 1))[row]
+    # the first number of a row is its J
+    first = np.concatenate(([True], row[1:] != row[:-1]))
+    jrows = (numbers[first].astype(int) - 1)[np.cumsum(first) - 1]
+    values = ~first
+    layer[jrows[values], icols[np.searchsorted(bounds, centres[values])]] = numbers[values]
+
+
+def parseTable(buf, ni, nj, nk):
+    """ Converts the table lines of one property at one timestep to a (nk, nj, ni)
+        array. "All" and "Plane ... All" constants are filled in with numpy, cells
+        left empty in the table are NaN.
+    """
+    data = np.full((nk, nj, ni), np.nan)
+    k = 0
+    columns = None
+    rows = []
+    for line in buf.splitlines():
+        s = line.lstrip()
+        if s.startswith(b"J="):
+            rows.append(line)
+            continue
+        if rows:
+            readRows(data[k], rows, columns)
+            rows = []
+        if s.startswith(b"All "):
+            data[:] = float(s.split()[3])
+            break
+        elif s.startswith(b"Plane "):
+            item = s.split()
+            k = int(item[3]) - 1
+            if len(item) > 4 and item[4] == b"All":
+                data[k] = float(item[7])
+        elif s.startswith((b"I ", b"I=")):
+            columns = tableColumns(line)
+    if rows:
+        readRows(data[k], rows, columns)
+    return data
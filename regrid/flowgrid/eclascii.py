@@ -0,0 +1,208 @@
+import mmap
+import re
+import numpy as np
+
+from regrid.flowgrid.repeat import compressRepeats, parseRepeats
+
+# A keyword sits alone on its line, optionally followed by a comment, e.g.
+#   ZCORN                                  -- Generated : ReGrid
+KEYWORD = re.compile(rb"^[ \t]*([A-Z][A-Z0-9_+-]+)[ \t]*(?:--[^\n]*)?\r?$", re.M)
+COMMENT = re.compile(rb"--[^\n]*")
+
+# Keywords that carry integer data, everything else is read as float
+INTEGER = {"SPECGRID", "COORDSYS", "DIMENS", "ACTNUM", "EQLNUM", "FIPNUM", "PVTNUM", "SATNUM"}
+
+# Bytes parsed at a time when a block is read into a preallocated array
+CHUNKSIZE = 64 * 1024 * 1024
+
+# Values formatted at a time by writeValues
+WRITECHUNK = 1024 * 1024
+
+
+def scanKeywords(buf):
+    """ Finds every keyword in an ECLIPSE ASCII buffer in a single pass.
+        buf = bytes (or anything supporting the buffer protocol)
+        returns a list of (keyword, start, end) where buf[start:end] is the data
+        block following the keyword, without the terminating slash
+    """
+    matches = list(KEYWORD.finditer(buf))
+    blocks = []
+    for im, match in enumerate(matches):
+        start = match.end()
+        stop = matches[im + 1].start() if im + 1 < len(matches) else len(buf)
+        end = findSlash(buf, start, stop)
+        blocks.append((match.group(1).decode(), start, end))
+    return blocks
+
+
+def findSlash(buf, start, stop):
+    """ Position of the slash terminating the data block in buf[start:stop],
+        slashes inside of -- comments are skipped. Keywords without data have
+        no slash, then stop is returned.
+    """
+    pos = buf.find(b"/", start, stop)
+    while pos != -1:
+        lstart = buf.rfind(b"\n", start, pos) + 1
+        if buf.find(b"--", max(lstart, start), pos) == -1:
+            return pos
+        lend = buf.find(b"\n", pos, stop)
+        if lend == -1:
+            break
+        pos = buf.find(b"/", lend, stop)
+    return stop
+
+
+def parseValues(block, dtype=float):
+    """ Converts a whitespace separated block of ECLIPSE values to a numpy array.
+        Blocks are converted by numpy directly, N*value repeats included (see
+        parseRepeats), so no per-value Python object is ever created. Raises
+        ValueError for non-numeric data.
+    """
+    if b"--" in block:
+        block = COMMENT.sub(b"", block)
+    if not block.strip():
+        return np.zeros(0, dtype=dtype)
+    if b"*" not in block:
+        return np.fromstring(block, dtype=dtype, sep=" ")
+    return parseRepeats(block, dtype)
+
+
+def readBlock(buf, start, end, out, chunksize=CHUNKSIZE):
+    """ Parses buf[start:end] into the preallocated array out, chunksize bytes at
+        a time. Chunks are cut at line ends so that neither values nor comments
+        are split. Returns the number of values read.
+    """
+    count = 0
+    pos = start
+    while pos < end:
+        stop = min(pos + chunksize, end)
+        if stop < end:
+            cut = buf.rfind(b"\n", pos, stop)
+            if cut == -1:
+                # a single very long line, cut on whitespace instead
+                cut = max(buf.rfind(b" ", pos, stop), buf.rfind(b"\t", pos, stop))
+            if cut != -1:
+                stop = cut + 1
+        values = parseValues(buf[pos:stop], out.dtype)
+        if count + len(values) > len(out):
+            raise ValueError("block holds more than the expected %i values" % len(out))
+        out[count:count + len(values)] = values
+        count += len(values)
+        pos = stop
+    return count
+
+
+class KeywordFile(object):
+    """ Keyword index over an ECLIPSE ASCII (GRDECL) file. The file is either read
+        into memory or memory-mapped, in both cases it is scanned once for the
+        byte ranges of its keywords and blocks are only converted when read.
+    """
+
+    def __init__(self, fname, mapped=False, chunksize=CHUNKSIZE):
+        """ fname = file name
+            mapped = memory-map the file instead of reading it into memory
+            chunksize = bytes parsed at a time by read when size is given
+        """
+        self.chunksize = chunksize
+        with open(fname, "rb") as fp:
+            if mapped:
+                self.buf = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self.buf = fp.read()
+        self.blocks = {}
+        for keyword, start, end in scanKeywords(self.buf):
+            self.blocks[keyword] = (start, end)
+
+    def __contains__(self, keyword):
+        return keyword in self.blocks
+
+    def __iter__(self):
+        return iter(self.blocks)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        if isinstance(self.buf, mmap.mmap):
+            self.buf.close()
+
+    def read(self, keyword, size=None):
+        """ Converts the data block of keyword.
+            size = expected number of values. If given, the block is parsed in
+                   chunks into a preallocated array, so peak memory stays at the
+                   size of the output, and the count is checked.
+        """
+        start, end = self.blocks[keyword]
+        if size is None:
+            return parseBlock(self.buf[start:end], keyword)
+        out = np.empty(size, dtype=int if keyword in INTEGER else float)
+        count = readBlock(self.buf, start, end, out, self.chunksize)
+        if count != size:
+            raise ValueError("%s holds %i values, expected %i" % (keyword, count, size))
+        return out
+
+
+def readKeywords(fname, keywords=None):
+    """ Reads an ECLIPSE ASCII (GRDECL) file in one pass.
+        fname = file name
+        keywords = optional collection of keywords to convert, others are skipped
+        returns a dict of keyword -> numpy array, non-numeric blocks
+        (e.g. SPECGRID with its F flag) are returned as a list of strings
+    """
+    data = {}
+    with KeywordFile(fname) as kf:
+        for keyword in kf:
+            if keywords is None or keyword in keywords:
+                data[keyword] = kf.read(keyword)
+    return data
+
+
+def parseBlock(block, keyword):
+    """ Converts one keyword data block using the type the keyword calls for
+    """
+    dtype = int if keyword in INTEGER else float
+    try:
+        return parseValues(block, dtype)
+    except ValueError:
+        return COMMENT.sub(b"", block).decode(errors="replace").split()
+
+
+def writeValues(f, values, fmt, perline=8, chunksize=WRITECHUNK):
+    """ Writes values as a GRDECL data block body, perline values to a line.
+        Whole chunks are formatted with a single % operation and written at once.
+    """
+    values = np.ravel(values)
+    nfull = len(values) // perline * perline
+    line = " " + " ".join([fmt] * perline) + "\n"
+    step = max(1, chunksize // perline) * perline
+    for start in range(0, nfull, step):
+        chunk = values[start:min(nfull, start + step)]
+        f.write((line * (len(chunk) // perline)) % tuple(chunk.tolist()))
+    if nfull < len(values):
+        rest = values[nfull:]
+        f.write((" " + " ".join([fmt] * len(rest)) + "\n") % tuple(rest.tolist()))
+
+
+def writeRepeats(f, values, fmt, perline=8, chunksize=WRITECHUNK):
+    """ Writes values as a GRDECL data block body with runs of equal values
+        compressed to N*value tokens, perline tokens to a line. The runs are
+        found with numpy and each chunk of tokens is formatted with a single %.
+    """
+    counts, runs = compressRepeats(values)
+    single = counts == 1
+    for start in range(0, len(runs), chunksize):
+        c, r, s = counts[start:start + chunksize], runs[start:start + chunksize], single[start:start + chunksize]
+        # N*value takes two arguments, a single value one
+        width = np.where(s, 1, 2)
+        pos = np.cumsum(width) - width
+        args = np.empty(pos[-1] + width[-1], dtype=float if r.dtype.kind == "f" else np.int64)
+        args[pos[~s]] = c[~s]
+        args[pos + width - 1] = r
+        formats = np.where(s, " " + fmt, " %d*" + fmt).astype(object)
+        formats[perline - 1::perline] += "\n"
+        if len(formats) % perline:
+            formats[-1] += "\n"
+        f.write("".join(formats) % tuple(args.tolist()))
@@ -0,0 +1,161 @@
+import numpy as np
+
+# ECLIPSE unformatted files (EGRID, INIT, UNRST, ...) are sequences of big-endian
+# Fortran records. Each keyword is a 16 byte header record
+#     name (8 chars), number of items (int32), type (4 chars)
+# followed by its data, split over records of at most 1000 items (105 for strings).
+TYPES = {
+    "INTE": np.dtype(">i4"),
+    "REAL": np.dtype(">f4"),
+    "DOUB": np.dtype(">f8"),
+    "LOGI": np.dtype(">i4"),
+    "CHAR": np.dtype("S8"),
+    "MESS": np.dtype("S1"),
+}
+MARKER = np.dtype(">i4")
+
+
+def itemType(etype):
+    """ numpy dtype and items per record of an ECLIPSE type string
+    """
+    if etype.startswith("C0"):
+        return np.dtype("S" + str(int(etype[2:]))), 105
+    if etype == "CHAR":
+        return TYPES[etype], 105
+    return TYPES[etype], 1000
+
+
+def dataBytes(count, etype):
+    """ Number of bytes, record markers included, taken by count items of etype
+    """
+    dtype, block = itemType(etype)
+    nrec = -(-count // block)
+    return count * dtype.itemsize + 8 * nrec
+
+
+def readHeader(fp):
+    """ Reads a keyword header record, returns (keyword, count, type) or None at the end of file
+    """
+    head = fp.read(24)
+    if len(head) < 24:
+        return None
+    if np.frombuffer(head[0:4], dtype=MARKER)[0] != 16:
+        raise ValueError("not an unformatted ECLIPSE file, bad record marker at %i" % (fp.tell() - 24))
+    keyword = head[4:12].decode("ascii").strip()
+    count = int(np.frombuffer(head[12:16], dtype=MARKER)[0])
+    etype = head[16:20].decode("ascii")
+    return keyword, count, etype
+
+
+def readData(fp, count, etype):
+    """ Reads the records of one keyword in bulk and strips the record markers
+    """
+    dtype, block = itemType(etype)
+    raw = np.fromfile(fp, dtype=np.uint8, count=dataBytes(count, etype))
+    nfull = count // block
+    recbytes = block * dtype.itemsize + 8
+    body = raw[:nfull * recbytes].reshape(nfull, recbytes)[:, 4:-4].reshape(-1)
+    if count % block:
+        body = np.concatenate((body, raw[nfull * recbytes + 4:-4]))
+    data = body.view(dtype)
+    if dtype.kind == "S":
+        return np.char.strip(np.char.decode(data, "ascii"))
+    # native byte order, so the arrays can be handed to numpy and VTK directly
+    return data.astype(dtype.newbyteorder("="))
+
+
+def readRecords(fname, keywords=None):
+    """ Iterates over the keywords of an unformatted ECLIPSE file in file order,
+        yielding (keyword, array). The data of keywords not in keywords is
+        skipped without being read.
+    """
+    with open(fname, "rb") as fp:
+        while True:
+            header = readHeader(fp)
+            if header is None:
+                break
+            keyword, count, etype = header
+            if keywords is None or keyword in keywords:
+                yield keyword, readData(fp, count, etype)
+            else:
+                fp.seek(dataBytes(count, etype), 1)
+
+
+def readBinaryKeywords(fname, keywords=None):
+    """ Reads an unformatted ECLIPSE file into a dict of keyword -> numpy array.
+        For repeated keywords the first occurrence is kept.
+    """
+    data = {}
+    for keyword, values in readRecords(fname, keywords):
+        if keyword not in data:
+            data[keyword] = values
+    return data
+
+
+# Records written at a time by writeData, bounds the size of the output buffer
+WRITECHUNK = 1024
+
+
+def recordType(values):
+    """ ECLIPSE type string for a numpy array
+    """
+    kind = values.dtype.kind
+    if kind == "f":
+        return "DOUB" if values.dtype.itemsize == 8 else "REAL"
+    if kind in "iu":
+        return "INTE"
+    if kind == "b":
+        return "LOGI"
+    if kind in "US":
+        return "CHAR"
+    raise ValueError("no ECLIPSE type for %s" % values.dtype)
+
+
+def writeHeader(fp, keyword, count, etype):
+    """ Writes a keyword header record
+    """
+    if len(keyword) > 8:
+        raise ValueError("keyword %s is longer than 8 characters" % keyword)
+    marker = np.array(16, dtype=MARKER).tobytes()
+    fp.write(marker + keyword.ljust(8).encode("ascii") + np.array(count, dtype=MARKER).tobytes()
+             + etype.encode("ascii") + marker)
+
+
+def writeData(fp, values, etype, chunksize=WRITECHUNK):
+    """ Writes values as records of etype, the record markers are set for whole
+        chunks of records with array assignments
+    """
+    dtype, block = itemType(etype)
+    values = np.ravel(values)
+    if dtype.kind == "S":
+        values = np.char.ljust(np.char.encode(np.asarray(values, dtype=str), "ascii"), dtype.itemsize)
+    elif etype == "LOGI":
+        # ECLIPSE writes true as -1
+        values = np.where(values, -1, 0)
+    data = np.ascontiguousarray(values, dtype=dtype).view(np.uint8)
+    count = len(values)
+    recbytes = block * dtype.itemsize
+    nfull = count // block
+    marker = np.frombuffer(np.array(recbytes, dtype=MARKER).tobytes(), dtype=np.uint8)
+    for start in range(0, nfull, chunksize):
+        nrec = min(chunksize, nfull - start)
+        out = np.empty((nrec, recbytes + 8), dtype=np.uint8)
+        out[:, :4] = marker
+        out[:, 4:-4] = data[start * recbytes:(start + nrec) * recbytes].reshape(nrec, recbytes)
+        out[:, -4:] = marker
+        fp.write(out.tobytes())
+    if count % block:
+        rest = data[nfull * recbytes:]
+        marker = np.array(len(rest), dtype=MARKER).tobytes()
+        fp.write(marker + rest.tobytes() + marker)
+
+
+def writeRecord(fp, keyword, values, etype=None):
+    """ Writes one keyword, header and data
+        etype = ECLIPSE type string, by default taken from the dtype of values
+    """
+    values = np.asarray(values)
+    if etype is None:
+        etype = recordType(values)
+    writeHeader(fp, keyword, values.size, etype)
+    writeData(fp, values, etype)
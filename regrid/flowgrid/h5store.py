@@ -0,0 +1,130 @@
+import re
+import numpy as np
+
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+# Layout of a store
+#   /                     attrs GridType, version
+#   /geometry/            Points and Dimensions, Dimensions and X/Y/ZCoordinates (rectilinear
+#                         grids, image data) or Points, Offsets, Connectivity, CellTypes
+#   /properties/<name>    static cell (or point, attr point=True) arrays in VTK order
+#   /timeseries/<title>/  one dataset per timestep, attr times lists them in order
+STOREVERSION = 1
+
+# Values per chunk along the first axis
+CHUNKSIZE = 256 * 1024
+
+# Time series arrays are named title[time], like CMG.readOutputProperty does
+TIMESERIES = re.compile(r"^(.*)\[(.*)\]$")
+
+
+def requireH5py():
+    if h5py is None:
+        raise ImportError("h5py is required for HDF5 grid stores, pip install h5py")
+
+
+def writeDataset(group, name, data, compression="gzip"):
+    """ Writes an array as a chunked, compressed dataset
+    """
+    data = np.ascontiguousarray(data)
+    if data.size == 0 or data.ndim == 0:
+        return group.create_dataset(name, data=data)
+    chunks = (min(len(data), CHUNKSIZE),) + data.shape[1:]
+    return group.create_dataset(name, data=data, chunks=chunks, compression=compression, shuffle=True)
+
+
+def writeStore(fname, arrays, compression="gzip"):
+    """ Writes the arrays of FlowGrid.gridArrays to an HDF5 store
+    """
+    requireH5py()
+    with h5py.File(fname, "w") as f:
+        f.attrs["version"] = STOREVERSION
+        f.attrs["GridType"] = arrays["GridType"]
+        geometry = f.create_group("geometry")
+        properties = f.create_group("properties")
+        timeseries = f.create_group("timeseries")
+        for name, data in arrays.items():
+            if name == "GridType":
+                continue
+            if not name.startswith(("cell:", "point:")):
+                writeDataset(geometry, name, data, compression)
+                continue
+            point = name.startswith("point:")
+            name = name.split(":", 1)[1]
+            match = TIMESERIES.match(name)
+            if match:
+                title, time = match.groups()
+                if title not in timeseries:
+                    timeseries.create_group(title).attrs["times"] = []
+                group = timeseries[title]
+                group.attrs["times"] = list(group.attrs["times"]) + [time]
+                group.attrs["point"] = point
+                writeDataset(group, time, data, compression)
+            else:
+                writeDataset(properties, name, data, compression).attrs["point"] = point
+
+
+class GridStore(object):
+    """ Read access to an HDF5 grid store. Opening it only reads the metadata (names,
+        timesteps, shapes), every array is read from disk the first time it is asked
+        for and kept until released.
+    """
+
+    def __init__(self, fname):
+        requireH5py()
+        self.fname = fname
+        self.file = h5py.File(fname, "r")
+        self.GridType = self.file.attrs["GridType"]
+        self.properties = list(self.file["properties"])
+        self.timeseries = dict((title, [str(t) for t in group.attrs["times"]])
+                               for title, group in self.file["timeseries"].items())
+        self.loaded = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.file.close()
+
+    def geometry(self):
+        """ The arrays FlowGrid.restoreGrid needs to rebuild the VTK grid
+        """
+        arrays = dict((name, dataset[()]) for name, dataset in self.file["geometry"].items())
+        arrays["GridType"] = self.GridType
+        return arrays
+
+    def isPoint(self, name):
+        """ True if name is point data rather than cell data
+        """
+        match = TIMESERIES.match(name)
+        if name not in self.properties and match and match.group(1) in self.timeseries:
+            return bool(self.file["timeseries"][match.group(1)].attrs["point"])
+        return bool(self.file["properties"][name].attrs["point"])
+
+    def read(self, name):
+        """ A property, or a timestep given as title[time], read on first use
+        """
+        if name not in self.loaded:
+            match = TIMESERIES.match(name)
+            if name not in self.properties and match and match.group(1) in self.timeseries:
+                dataset = self.file["timeseries"][match.group(1)][match.group(2)]
+            elif name in self.properties:
+                dataset = self.file["properties"][name]
+            else:
+                raise KeyError("%s is not in %s" % (name, self.fname))
+            self.loaded[name] = dataset[()]
+        return self.loaded[name]
+
+    def release(self, name=None):
+        """ Drops a loaded array, or all of them, from memory
+        """
+        if name is None:
+            self.loaded.clear()
+        else:
+            self.loaded.pop(name, None)
@@ -0,0 +1,54 @@
+import numpy as np
+
+# Coordinates may differ by this fraction of the extent of the grid and still be
+# taken as equal, corner point exports round them
+TOLERANCE = 1e-6
+
+
+def pillarAxes(coords, ne, nn, tolerance=TOLERANCE):
+    """ X and Y axes of a corner point grid whose pillars are vertical and lined up,
+        x only changing with I and y only with J
+        coords = COORD, top and bottom point of each of the (ne+1)*(nn+1) pillars
+        returns (X, Y), None if the pillars are not on such a grid
+    """
+    pillars = np.reshape(coords, (nn + 1, ne + 1, 2, 3))
+    X = pillars[0, :, 0, 0]
+    Y = pillars[:, 0, 0, 1]
+    atol = tolerance * max(np.ptp(X), np.ptp(Y), 1.)
+    if not (np.all(np.abs(pillars[..., 0] - X[None, :, None]) <= atol) and
+            np.all(np.abs(pillars[..., 1] - Y[:, None, None]) <= atol)):
+        return None
+    return X.copy(), Y.copy()
+
+
+def layerAxis(zcorn, ne, nn, nz, tolerance=TOLERANCE):
+    """ Z axis of a corner point grid whose layers are flat and stacked without gaps,
+        every corner of a layer top (bottom) at the same depth, the bottom of each
+        layer at the top of the next. Layers are checked one at a time and the check
+        stops at the first one that is not flat.
+        zcorn = ZCORN, eight corner depths per cell
+        returns Z, the nz + 1 surface depths, None if the layers are not flat
+    """
+    Z = np.reshape(zcorn, (nz, 2, nn, 2, ne, 2))
+    surfaces = np.concatenate((Z[:, 0, 0, 0, 0, 0], Z[-1:, 1, 0, 0, 0, 0]))
+    if not np.all(np.isfinite(surfaces)):
+        return None
+    atol = tolerance * max(np.ptp(surfaces), 1.)
+    for k in range(nz):
+        if not (np.all(np.abs(Z[k, 0] - surfaces[k]) <= atol) and
+                np.all(np.abs(Z[k, 1] - surfaces[k + 1]) <= atol)):
+            return None
+    return surfaces
+
+
+def rectilinearAxes(coords, zcorn, ne, nn, nz, tolerance=TOLERANCE):
+    """ (X, Y, Z) axes of a corner point grid that is rectilinear within tolerance,
+        None otherwise. The grid is then fully described by the axes.
+    """
+    xy = pillarAxes(coords, ne, nn, tolerance)
+    if xy is None:
+        return None
+    Z = layerAxis(zcorn, ne, nn, nz, tolerance)
+    if Z is None:
+        return None
+    return xy[0], xy[1], Z
@@ -0,0 +1,59 @@
+import numpy as np
+
+# ECLIPSE and CMG both write repeated values as N*value, e.g. 4*0.25
+
+
+def parseRepeats(block, dtype=float):
+    """ Converts a whitespace separated bytes block with N*value repeats to a typed
+        array, without splitting it into Python tokens. The tokens holding a star
+        are found on the raw bytes, with the stars taken as spaces numpy then reads
+        every count and value in one go.
+    """
+    chars = np.frombuffer(block, dtype=np.uint8)
+    space = np.zeros(256, dtype=bool)
+    space[list(b" \t\n\r\f\v")] = True
+    filled = ~space[chars]
+    # token number of every byte, counted from the token starts
+    starts = filled.copy()
+    starts[1:] &= ~filled[:-1]
+    token = np.cumsum(starts) - 1
+    ntokens = int(token[-1]) + 1 if len(token) else 0
+    if ntokens == 0:
+        # numpy reads a blank string as a single -1
+        return np.zeros(0, dtype=dtype)
+    repeat = np.zeros(ntokens, dtype=bool)
+    repeat[token[chars == ord("*")]] = True
+
+    numbers = np.fromstring(bytes(block).replace(b"*", b" "), dtype=float, sep=" ")
+    if len(numbers) != ntokens + np.count_nonzero(repeat):
+        raise ValueError("malformed N*value repeat")
+    # each repeat token reads as two numbers, its count and its value
+    first = np.arange(ntokens) + np.cumsum(repeat) - repeat
+    counts = np.where(repeat, numbers[first], 1).astype(np.int64)
+    if np.any(counts < 0):
+        raise ValueError("negative repeat count")
+    return np.repeat(numbers[first + repeat].astype(dtype), counts)
+
+
+def compressRepeats(values):
+    """ Run-length encodes an array, the inverse of parseRepeats
+        returns (counts, values) of the runs of equal values
+    """
+    values = np.ravel(values)
+    if len(values) == 0:
+        return np.zeros(0, dtype=np.int64), values
+    starts = np.concatenate(([0], np.flatnonzero(values[1:] != values[:-1]) + 1))
+    counts = np.diff(np.append(starts, len(values)))
+    return counts, values[starts]
+
+
+def roundSignificant(values, digits):
+    """ Rounds values to a number of significant digits, so that runs are found
+        at the precision the values are written with
+    """
+    values = np.asarray(values, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        exponent = np.floor(np.log10(np.abs(values)))
+    exponent[~np.isfinite(exponent)] = 0
+    scale = 10. ** (digits - 1 - exponent)
+    return np.round(values * scale) / scale
@@ -0,0 +1,87 @@
+import numpy as np
+
+# Corners are numbered as in GRDECL.CornerDepths:
+#   top    SW 0, SE 1, NW 2, NE 3
+#   bottom SW 4, SE 5, NW 6, NE 7
+# and the faces are cycles over the corners, all with the same orientation.
+FACES = np.array([[0, 1, 3, 2],   # top
+                  [4, 6, 7, 5],   # bottom
+                  [0, 4, 5, 1],   # south
+                  [2, 3, 7, 6],   # north
+                  [0, 2, 6, 4],   # west
+                  [1, 5, 7, 3]])  # east
+
+# Cells handled at a time, bounds the size of the temporaries
+CHUNKSIZE = 1000000
+
+
+def pillarCorners(coords, ne, nn, depths):
+    """ Corner point coordinates of cells, found by intersecting the pillars with the corner depths
+        coords = COORD, top and bottom point of each of the (ne+1)*(nn+1) pillars
+        depths = (ne, nn, m, 8) corner depths of m layers
+        returns X, Y, Z, each (8, ne, nn, m)
+    """
+    pillars = np.reshape(coords, (nn + 1, ne + 1, 2, 3)).transpose(1, 0, 2, 3)
+    # float64 whatever the depths are stored in, map coordinates need it
+    Z = np.ascontiguousarray(np.moveaxis(depths, -1, 0), dtype=float)
+    X = np.empty_like(Z)
+    Y = np.empty_like(Z)
+    for c in range(8):
+        ix, jy = c & 1, (c >> 1) & 1
+        top = np.moveaxis(pillars[ix:ne + ix, jy:nn + jy, 0, :, None], 2, 0)
+        bot = np.moveaxis(pillars[ix:ne + ix, jy:nn + jy, 1, :, None], 2, 0)
+        X[c], Y[c] = pillarPoints(top, bot, Z[c])
+    return X, Y, Z
+
+
+def pillarPoints(top, bottom, Z):
+    """ x and y of the points at depths Z along pillars
+        top, bottom = (x, y, z) of the pillar ends, each broadcasting against Z
+        Pillars with both ends at the same depth keep the x and y of their top.
+    """
+    dz = bottom[2] - top[2]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.where(dz != 0, (Z - top[2]) / dz, 0.)
+    return top[0] + t * (bottom[0] - top[0]), top[1] + t * (bottom[1] - top[1])
+
+
+def hexahedronVolumes(X, Y, Z):
+    """ Volumes of hexahedra with possibly non-planar faces
+        X, Y, Z = (8, ...) corner coordinates
+        Each face is split into four triangles around its centre and each triangle
+        spans a tetrahedron with the cell centre, the 24 tetrahedra are summed.
+        Summed over a face the four triple products reduce to the centre of the
+        face dotted with the cross product of its diagonals.
+    """
+    # relative to the cell centre, for precision with large map coordinates
+    X, Y, Z = X - np.mean(X, axis=0), Y - np.mean(Y, axis=0), Z - np.mean(Z, axis=0)
+    volume = np.zeros(X.shape[1:])
+    for p0, p1, p2, p3 in FACES:
+        dx0, dy0, dz0 = X[p2] - X[p0], Y[p2] - Y[p0], Z[p2] - Z[p0]
+        dx1, dy1, dz1 = X[p3] - X[p1], Y[p3] - Y[p1], Z[p3] - Z[p1]
+        fx = X[p0] + X[p1] + X[p2] + X[p3]
+        fy = Y[p0] + Y[p1] + Y[p2] + Y[p3]
+        fz = Z[p0] + Z[p1] + Z[p2] + Z[p3]
+        volume += fx * (dy0 * dz1 - dz0 * dy1) + fy * (dz0 * dx1 - dx0 * dz1) + fz * (dx0 * dy1 - dy0 * dx1)
+    return np.abs(volume) / 24.
+
+
+def cellVolumes(coords, depths, scale=1., chunksize=CHUNKSIZE):
+    """ Volumes of all cells of a corner point grid
+        coords = COORD
+        depths = (ne, nn, nz, 8) corner depths
+        scale = length unit conversion, e.g. f2m
+        returns (volumes, valid), both (ne, nn, nz). Cells with missing or
+        collapsed corners are flagged in valid and get a volume of 0.
+    """
+    ne, nn, nz = depths.shape[0:3]
+    volumes = np.zeros((ne, nn, nz))
+    # chunk over whole layers
+    step = max(1, chunksize // max(1, ne * nn))
+    for k0 in range(0, nz, step):
+        k1 = min(nz, k0 + step)
+        X, Y, Z = pillarCorners(coords, ne, nn, depths[:, :, k0:k1])
+        volumes[:, :, k0:k1] = hexahedronVolumes(X, Y, Z) * scale ** 3
+    valid = np.isfinite(volumes) & (volumes > 0)
+    volumes[~valid] = 0.
+    return volumes, valid
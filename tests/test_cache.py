@@ -0,0 +1,113 @@
+import os
+import time
+
+import numpy as np
+import pytest
+from vtk.util.numpy_support import vtk_to_numpy
+
+from regrid.flowgrid.cache import GridCache
+from regrid.flowgrid.FlowGrid import GRDECL
+
+
+def writeGRDECL(fname, ne=3, nn=2, nz=2):
+    # vertical pillars, layers dipping to the east so that the grid is not rectilinear
+    x, y = np.meshgrid(100. * np.arange(ne + 1), 50. * np.arange(nn + 1))
+    coord = np.stack((x, y, np.full(x.shape, 1000.), x, y, np.full(x.shape, 1100.)), axis=-1)
+    k, t, j, jy, i, ix = np.indices((nz, 2, nn, 2, ne, 2))
+    zcorn = 1000. + 10. * (k + t) + 0.5 * (i + ix)
+    active = np.ones(ne * nn * nz, dtype=int)
+    active[1] = 0
+    with open(fname, "w") as f:
+        f.write("SPECGRID\n  %i %i %i 1 F /\n\n" % (ne, nn, nz))
+        f.write("COORD\n" + " ".join("%.2f" % v for v in coord.ravel()) + " /\n\n")
+        f.write("ZCORN\n" + " ".join("%.2f" % v for v in zcorn.ravel()) + " /\n\n")
+        f.write("ACTNUM\n" + " ".join("%i" % v for v in active) + " /\n")
+    return zcorn.ravel()
+
+
+def load(fname, cache, points=np.float64):
+    grid = GRDECL()
+    grid.setPrecision(points=points)
+    grid.cache = cache
+    grid.loadNodes(fname)
+    return grid
+
+
+def test_store_load(tmp_path):
+    source = tmp_path / "source.txt"
+    source.write_bytes(b"0123456789")
+    cache = GridCache(str(tmp_path / "cache"))
+    key = cache.key([str(source)], "tag")
+    assert cache.load(key) is None
+    cache.store(key, {"values": np.arange(5.), "n": 5})
+    values = cache.load(cache.key([str(source)], "tag"))
+    np.testing.assert_array_equal(values["values"], np.arange(5.))
+    assert values["n"] == 5
+    assert cache.load(cache.key([str(source)], "other")) is None
+
+
+def test_edit_with_same_size_and_mtime(tmp_path):
+    source = tmp_path / "source.txt"
+    source.write_bytes(b"a" * 100000)
+    cache = GridCache(str(tmp_path / "cache"))
+    cache.store(cache.key([str(source)], "tag"), {"values": np.arange(5.)})
+    stat = os.stat(source)
+    # file times come from a coarse clock
+    time.sleep(0.05)
+    source.write_bytes(b"a" * 50000 + b"b" + b"a" * 49999)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert cache.load(cache.key([str(source)], "tag")) is None
+
+
+def test_key_does_not_read_sources(tmp_path, monkeypatch):
+    source = tmp_path / "source.txt"
+    source.write_bytes(b"0123456789")
+    cache = GridCache(str(tmp_path / "cache"))
+
+    def refuse(*args, **kwargs):
+        raise AssertionError("source file opened")
+
+    monkeypatch.setattr("builtins.open", refuse)
+    assert cache.key([str(source)], "tag") == cache.key([str(source)], "tag")
+
+
+def test_cached_array_keys_once(tmp_path, monkeypatch):
+    source = tmp_path / "source.txt"
+    source.write_bytes(b"0123456789")
+    grid = GRDECL()
+    grid.cache = GridCache(str(tmp_path / "cache"))
+    keys = []
+    key = grid.cache.key
+    monkeypatch.setattr(grid.cache, "key", lambda *args: keys.append(args) or key(*args))
+    reads = []
+
+    def read():
+        reads.append(1)
+        return np.arange(3.)
+
+    for i in range(2):
+        np.testing.assert_array_equal(grid.cachedArray([str(source)], "tag", read), np.arange(3.))
+    assert len(keys) == 2 and len(reads) == 1
+
+
+@pytest.mark.parametrize("points", [np.float64, np.float32])
+def test_grid_hit_equals_miss(tmp_path, points):
+    fname = str(tmp_path / "grid.GRDECL")
+    zcorn = writeGRDECL(fname)
+    cache = GridCache(str(tmp_path / "cache"))
+    miss = load(fname, cache, points)
+    hit = load(fname, cache, points)
+    assert len(cache.entries()) == 1
+    assert hit.GridType == miss.GridType == "vtkStructuredGrid"
+    for name in ("CornerDepths", "ZZ", "ZZT", "ZZB", "ActiveCells", "coords"):
+        np.testing.assert_array_equal(getattr(hit, name), getattr(miss, name))
+    np.testing.assert_array_equal(vtk_to_numpy(hit.Grid.GetPoints().GetData()),
+                                  vtk_to_numpy(miss.Grid.GetPoints().GetData()))
+    if points == np.float64:
+        np.testing.assert_array_equal(hit.zcorn, zcorn)
+        np.testing.assert_array_equal(miss.zcorn, zcorn)
+    else:
+        assert hit.zcorn is None and miss.zcorn is None
+    hit.calculateVolumes()
+    miss.calculateVolumes()
+    np.testing.assert_array_equal(hit.Volumes, miss.Volumes)
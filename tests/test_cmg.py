@@ -0,0 +1,151 @@
+import numpy as np
+import pytest
+from vtk.util.numpy_support import vtk_to_numpy
+
+from regrid.flowgrid.FlowGrid import CMG
+
+NI, NJ, NK = 3, 2, 2
+DI, DJ = [100., 120., 80.], [50., 60.]
+NULL = [1, 1, 0, 1, 1, 1, 1, 0, 1, 1, 1, 1]
+
+
+def writeCorner(fname, zcorn):
+    with open(fname, "w") as f:
+        f.write("** corner point model\n*GRID *CORNER %i %i %i\n" % (NI, NJ, NK))
+        f.write("*DI *IVAR\n %s\n" % " ".join("%g" % d for d in DI))
+        f.write("*DJ *JVAR\n %s\n" % " ".join("%g" % d for d in DJ))
+        f.write("*ZCORN\n" + "\n".join(" ".join("%g" % z for z in zcorn[i:i + 8]) for i in range(0, len(zcorn), 8)) + "\n")
+        f.write("*NULL ALL\n %s\n" % " ".join("%i" % n for n in NULL))
+
+
+def nodeDepths(zcorn):
+    """ Node depths as documented for CMG.calcCoords, one node at a time """
+    Z = np.reshape(zcorn, (NK, 2, NJ, 2, NI, 2))
+    ZZ = np.empty((NK + 1, NJ + 1, NI + 1))
+    for k in range(NK + 1):
+        for j in range(NJ + 1):
+            for i in range(NI + 1):
+                # the cell to the west, the cell to the north and the layer below
+                ii, ix = (0, 0) if i == 0 else (i - 1, 1)
+                jj, jy = (j, 0) if j < NJ else (NJ - 1, 1)
+                kk, t = (k, 0) if k < NK else (NK - 1, 1)
+                ZZ[k, j, i] = Z[kk, t, jj, jy, ii, ix]
+    return ZZ
+
+
+def test_corner_nodes(tmp_path):
+    # every corner depth differs, so the test sees which corner each node takes
+    zcorn = 1000. + 0.5 * np.arange(8 * NI * NJ * NK)
+    fname = str(tmp_path / "corner.dat")
+    writeCorner(fname, zcorn)
+    grid = CMG()
+    grid.buildCorner(fname)
+    assert grid.GridType == "vtkStructuredGrid"
+    points = np.reshape(grid.gridPoints(), (NK + 1, NJ + 1, NI + 1, 3))
+    np.testing.assert_array_equal(points[0, 0, :, 0], [0., 100., 220., 300.])
+    np.testing.assert_array_equal(points[0, :, 0, 1], [0., 50., 110.])
+    np.testing.assert_array_equal(points[..., 2], nodeDepths(zcorn))
+    np.testing.assert_array_equal(np.ravel(grid.ActiveCells, order="F"), NULL)
+
+
+def test_flat_corner_rectilinear(tmp_path):
+    k, t = np.indices((NK, 2, NJ, 2, NI, 2))[0:2]
+    zcorn = (1000. + 10. * (k + t)).ravel()
+    fname = str(tmp_path / "flat.dat")
+    writeCorner(fname, zcorn)
+    structured = CMG()
+    structured.buildCorner(fname)
+    axes = CMG()
+    axes.buildCorner(fname, rectilinear=True)
+    assert axes.GridType == "vtkRectilinearGrid"
+    np.testing.assert_array_equal(axes.gridPoints(), structured.gridPoints())
+    np.testing.assert_array_equal(axes.ActiveCells, structured.ActiveCells)
+
+
+@pytest.fixture
+def cart(tmp_path):
+    fname = tmp_path / "cart.dat"
+    fname.write_text("*GRID *CART 4 3 2\n*DI *CON 100\n*DJ *CON 50\n*DK *CON 10\n*DEPTH *TOP 1 1 1 1000\n")
+    return str(fname)
+
+
+def test_cart_structured(cart):
+    grid = CMG()
+    grid.buildCart(cart)
+    assert grid.GridType == "vtkStructuredGrid"
+    np.testing.assert_array_equal(grid.gridDimensions(), [5, 4, 3])
+    points = np.reshape(grid.gridPoints(), (3, 4, 5, 3))
+    np.testing.assert_array_equal(points[:, 0, 0, 2], [1000., 990., 980.])
+    np.testing.assert_array_equal(points[2, 3, 4], [400., 150., 980.])
+
+
+def test_cart_image(cart, tmp_path):
+    structured = CMG()
+    structured.buildCart(cart)
+    image = CMG()
+    image.buildCart(cart, rectilinear=True)
+    assert image.GridType == "vtkImageData"
+    np.testing.assert_array_equal(image.gridPoints(), structured.gridPoints())
+    image.exportVTK(str(tmp_path / "cart"))
+    structured.exportVTK(str(tmp_path / "cart"))
+    assert sorted(f.name for f in tmp_path.glob("cart.vt*")) == ["cart.vti", "cart.vts"]
+
+
+# Two timesteps of a 4 x 3 x 2 grid, cell (3, 2, 1) is left empty
+OUT = b"""  CMG output
+ **********************************************
+  Time = 0.0   days
+
+                        Pressure (psia)
+
+  Plane K = 1
+    I =          1         2         3         4
+  J=  1     1001.000  1002.000  1003.000  1004.000
+  J=  2     1005.000  1006.000            1008.000
+  J=  3     1009.000  1010.000  1011.000  1012.000
+
+  Plane K = 2  All values are 7.5
+
+                        Water Saturation
+
+  All values are 0.25
+ **********************************************
+  Time = 10.0   days
+
+                        Pressure (psia)
+
+  All values are 2500
+"""
+
+
+def test_output_properties(cart, tmp_path):
+    fname = tmp_path / "run.out"
+    fname.write_bytes(OUT)
+    grid = CMG()
+    grid.buildCart(cart)
+    grid.readOutputProperties(str(fname), {"Pressure (psia)": "Pressure", "Water Saturation": "Sw"})
+    pressure = np.concatenate((np.arange(1001., 1013.), np.full(12, 7.5)))
+    pressure[6] = np.nan
+    # the series are kept under the titles with their spaces removed
+    series = getattr(grid, "Pressure(psia)")
+    assert sorted(series) == ["0.0", "10.0"]
+    np.testing.assert_array_equal(series["0.0"], pressure)
+    np.testing.assert_array_equal(series["10.0"], np.full(24, 2500.))
+    np.testing.assert_array_equal(grid.WaterSaturation["0.0"], np.full(24, 0.25))
+    cells = grid.Grid.GetCellData()
+    np.testing.assert_array_equal(vtk_to_numpy(cells.GetArray("Pressure[0.0]")), pressure)
+    np.testing.assert_array_equal(vtk_to_numpy(cells.GetArray("Sw[0.0]")), np.full(24, 0.25))
+    assert cells.GetArray("Sw[10.0]") is None
+    assert (tmp_path / "run.out.idx").exists()
+
+
+def test_output_selected_times(cart, tmp_path):
+    fname = tmp_path / "run.out"
+    fname.write_bytes(OUT)
+    grid = CMG()
+    grid.buildCart(cart)
+    grid.readOutputProperties(str(fname), {"Pressure (psia)": "Pressure"}, times=["10.0"])
+    assert list(getattr(grid, "Pressure(psia)")) == ["10.0"]
+    assert grid.Grid.GetCellData().GetArray("Pressure[0.0]") is None
+    np.testing.assert_array_equal(grid.readOutputArray(str(fname), "Pressure (psia)", "0.0")[:12],
+                                  np.where(np.arange(12) == 6, np.nan, np.arange(1001., 1013.)))
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from regrid.flowgrid.cmgdat import DatFile
+
+DAT = b"""** CMG input deck
+RESULTS SIMULATOR IMEX
+*GRID *CORNER 3 2 1
+*DI *IVAR
+ 100.0 2*50.0   ** comment with 4*1.0
+DJ CON 25
+*NULL *CON 1
+*ZCORN
+ 8*1000.0
+ 8*1000.5 2*1001 6*1001.5
+ 8*1010.0 8*1010.5
+ 8*1011.0
+*DI *CON 7
+"""
+
+
+@pytest.fixture(params=[False, True])
+def dat(tmp_path, request):
+    fname = tmp_path / "model.dat"
+    fname.write_bytes(DAT)
+    with DatFile(str(fname), mapped=request.param) as dat:
+        yield dat
+
+
+def test_keywords(dat):
+    assert "GRID" in dat and "*zcorn" in dat and "PERMI" not in dat
+    assert list(dat)[:3] == ["RESULTS", "GRID", "DI"]
+
+
+def test_modifiers_and_values(dat):
+    modifiers, values = dat.read("GRID", dtype=int)
+    assert modifiers == ["*CORNER"]
+    np.testing.assert_array_equal(values, [3, 2, 1])
+    modifiers, values = dat.read("*DJ")
+    assert modifiers == ["CON"]
+    np.testing.assert_array_equal(values, [25.])
+
+
+def test_repeats_and_comments(dat):
+    # the first DI is kept, the comment is skipped
+    modifiers, values = dat.read("DI", count=3)
+    assert modifiers == ["*IVAR"]
+    np.testing.assert_array_equal(values, [100., 50., 50.])
+    modifiers, zcorn = dat.read("ZCORN", count=48)
+    assert modifiers == []
+    np.testing.assert_array_equal(zcorn[14:18], [1000.5, 1000.5, 1001., 1001.])
+
+
+def test_errors(dat):
+    with pytest.raises(ValueError):
+        dat.read("ZCORN", count=24)
+    with pytest.raises(KeyError):
+        dat.read("PERMI")
@@ -0,0 +1,75 @@
+import numpy as np
+
+from regrid.flowgrid.cmgout import OutputIndex, parseTable, scanOutput, tableColumns
+
+# Tables as CMG prints them, the values centred under the column numbers of the
+# "I =" line rather than right aligned with them
+CENTRED = b"""  Plane K = 1
+    I =          1         2         3
+  J=  1     1308.799  1493.157  4071.314
+  J=  2     1310.112  1496.020  4075.951
+"""
+
+# Wide grids wrap the I columns into several groups, NULL cells are left empty
+WRAPPED = b"""  Plane K = 1
+  I =     1         2         3         4
+  J=  1   0.2500    0.2510              0.2530
+  J=  2             0.2610    0.2620    0.2630
+  I =     5         6
+  J=  1   0.2540    0.2550
+  J=  2   0.2640
+  Plane K = 2  All values are 0.3
+"""
+
+
+def test_centred_columns():
+    data = parseTable(CENTRED, 3, 2, 1)
+    np.testing.assert_allclose(data[0], [[1308.799, 1493.157, 4071.314], [1310.112, 1496.020, 4075.951]])
+
+
+def test_column_bounds():
+    icols, bounds = tableColumns(b"    I =          1         2         3")
+    np.testing.assert_array_equal(icols, [0, 1, 2])
+    assert len(bounds) == 2
+
+
+def test_wrapped_columns_and_empty_cells():
+    data = parseTable(WRAPPED, 6, 2, 2)
+    expected = [[0.25, 0.251, np.nan, 0.253, 0.254, 0.255],
+                [np.nan, 0.261, 0.262, 0.263, 0.264, np.nan]]
+    np.testing.assert_allclose(data[0], expected)
+    np.testing.assert_allclose(data[1], 0.3)
+
+
+def test_all_values():
+    data = parseTable(b"  All values are 2500\n", 4, 3, 2)
+    assert data.shape == (2, 3, 4)
+    np.testing.assert_allclose(data, 2500.)
+
+
+def test_right_aligned_columns():
+    rows = [b"    I =          1         2         3"]
+    rows += [b"  J=%3d   " % (j + 1) + b"".join(b"%10.3f" % (100. * j + i) for i in range(3)) for j in range(12)]
+    data = parseTable(b"  Plane K = 1\n" + b"\n".join(rows) + b"\n", 3, 12, 1)
+    np.testing.assert_allclose(data[0], 100. * np.arange(12)[:, None] + np.arange(3)[None, :])
+
+
+def test_scan_output(tmp_path):
+    fname = tmp_path / "model.out"
+    fname.write_bytes(b"""  Timestep 5
+  Time
+  Time = 10.0 days
+                        Pressure (psia)
+  All values are 2500
+  Time = 20.0 days
+                        Pressure (psia)
+""" + CENTRED + b"""
+  Time step size 2.5
+""")
+    times, blocks = scanOutput(str(fname))
+    assert [t for t, offset in times] == ["10.0", "20.0"]
+    assert [(title, time) for title, time, start, end in blocks] == [("Pressure(psia)", "10.0"), ("Pressure(psia)", "20.0")]
+
+    index = OutputIndex(str(fname), sidecar=False)
+    (time, start, end), = index.select("Pressure (psia)", ["20"])
+    np.testing.assert_allclose(parseTable(index.read(start, end), 3, 2, 1)[0, 0], [1308.799, 1493.157, 4071.314])
@@ -0,0 +1,71 @@
+import io
+
+import numpy as np
+import pytest
+
+from regrid.flowgrid.eclascii import KeywordFile, parseValues, readKeywords, scanKeywords, writeRepeats, writeValues
+
+
+def writeKeyword(f, keyword, write, values, fmt, perline):
+    f.write("%-38s -- Generated : ReGrid\n" % keyword)
+    write(f, values, fmt, perline=perline)
+    f.write(" /\n\n")
+
+
+@pytest.fixture
+def grdecl(tmp_path):
+    rng = np.random.default_rng(0)
+    data = {
+        "COORD": rng.uniform(0, 1000, 61).round(2),
+        "ZCORN": np.repeat(rng.uniform(1000, 1100, 30).round(2), 4),
+        "ACTNUM": (rng.uniform(size=97) > 0.2).astype(int),
+    }
+    fname = tmp_path / "grid.GRDECL"
+    with io.open(fname, "w", newline="\r\n") as f:
+        f.write("-- Generated [\n-- a comment / with a slash\n-- Generated ]\n\n")
+        f.write("SPECGRID\n  5 4 3 1 F /\n\n")
+        writeKeyword(f, "COORD", writeValues, data["COORD"], "%2.2f", 6)
+        writeKeyword(f, "ZCORN", writeRepeats, data["ZCORN"], "%2.2f", 8)
+        writeKeyword(f, "ACTNUM", writeRepeats, data["ACTNUM"], "%i", 16)
+    return str(fname), data
+
+
+def test_round_trip(grdecl):
+    fname, data = grdecl
+    keywords = readKeywords(fname)
+    assert list(keywords) == ["SPECGRID", "COORD", "ZCORN", "ACTNUM"]
+    assert keywords["SPECGRID"] == ["5", "4", "3", "1", "F"]
+    for keyword, values in data.items():
+        np.testing.assert_array_equal(keywords[keyword], values)
+    assert keywords["ACTNUM"].dtype.kind == "i"
+
+
+@pytest.mark.parametrize("mapped", [False, True])
+def test_chunked_read(grdecl, mapped):
+    fname, data = grdecl
+    with KeywordFile(fname, mapped=mapped, chunksize=64) as kf:
+        assert "ZCORN" in kf and "PORO" not in kf
+        np.testing.assert_array_equal(kf.read("ZCORN", size=len(data["ZCORN"])), data["ZCORN"])
+        np.testing.assert_array_equal(kf.read("ACTNUM", size=len(data["ACTNUM"])), data["ACTNUM"])
+        with pytest.raises(ValueError):
+            kf.read("COORD", size=len(data["COORD"]) + 1)
+
+
+def test_write_repeats():
+    f = io.StringIO()
+    writeRepeats(f, [1, 1, 1, 0, 2, 2], "%i", perline=2)
+    assert f.getvalue() == " 3*1 0\n 2*2\n"
+
+
+def test_write_values_wraps():
+    f = io.StringIO()
+    writeValues(f, np.arange(5.), "%.1f", perline=2, chunksize=2)
+    assert f.getvalue() == " 0.0 1.0\n 2.0 3.0\n 4.0\n"
+
+
+def test_scan_and_parse():
+    buf = b"PORO -- porosity\n 0.1 2*0.2 -- trailing / comment\n 0.3 /\nNOECHO\n"
+    (keyword, start, end), (other, ostart, oend) = scanKeywords(buf)
+    assert (keyword, other) == ("PORO", "NOECHO")
+    np.testing.assert_array_equal(parseValues(buf[start:end]), [.1, .2, .2, .3])
+    assert not buf[ostart:oend].strip()
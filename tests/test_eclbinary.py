@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from regrid.flowgrid.eclbinary import readBinaryKeywords, readRecords, writeRecord
+
+
+@pytest.fixture
+def egrid(tmp_path):
+    data = {
+        "FILEHEAD": np.arange(100, dtype=np.int32),
+        "COORD": np.linspace(0., 1., 2503, dtype=np.float32),
+        "ZCORN": np.linspace(1000., 2000., 1000),
+        "ACTNUM": np.arange(2000) % 3,
+        "NAMES": np.array(["SWAT", "PRESSURE", "SGAS"]),
+    }
+    fname = tmp_path / "grid.EGRID"
+    with open(fname, "wb") as fp:
+        for keyword, values in data.items():
+            writeRecord(fp, keyword, values)
+        writeRecord(fp, "ACTNUM", np.zeros(4, dtype=int))
+        writeRecord(fp, "ENDGRID", np.zeros(0, dtype=np.int32))
+    return str(fname), data
+
+
+def test_round_trip(egrid):
+    fname, data = egrid
+    keywords = readBinaryKeywords(fname)
+    assert list(keywords) == list(data) + ["ENDGRID"]
+    for keyword, values in data.items():
+        np.testing.assert_array_equal(keywords[keyword], values)
+    assert keywords["COORD"].dtype == np.float32
+    assert keywords["ZCORN"].dtype == np.float64
+    assert len(keywords["ENDGRID"]) == 0
+
+
+def test_records_in_file_order(egrid):
+    fname, data = egrid
+    records = list(readRecords(fname, ("ACTNUM",)))
+    assert [keyword for keyword, values in records] == ["ACTNUM", "ACTNUM"]
+    np.testing.assert_array_equal(records[1][1], 0)
+
+
+def test_logical_and_explicit_type(tmp_path):
+    fname = tmp_path / "flags.INIT"
+    with open(fname, "wb") as fp:
+        writeRecord(fp, "LOGIHEAD", np.array([True, False, True]))
+        writeRecord(fp, "PORO", np.array([0.1, 0.2]), "REAL")
+    keywords = readBinaryKeywords(str(fname))
+    np.testing.assert_array_equal(keywords["LOGIHEAD"], [-1, 0, -1])
+    assert keywords["PORO"].dtype == np.float32
+
+
+def test_long_keyword(tmp_path):
+    with open(tmp_path / "bad", "wb") as fp:
+        with pytest.raises(ValueError):
+            writeRecord(fp, "TOOLONGNAME", np.zeros(1))
+
+
+def test_not_unformatted(tmp_path):
+    fname = tmp_path / "grid.GRDECL"
+    fname.write_bytes(b"SPECGRID\n  10 10 5 1 F /\n\nCOORDSYS\n  1 4 /\n")
+    with pytest.raises(ValueError):
+        readBinaryKeywords(str(fname))
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+from vtk.util.numpy_support import vtk_to_numpy
+
+from regrid.flowgrid.eclbinary import writeRecord
+from regrid.flowgrid.FlowGrid import EGRID, f2m
+
+NE, NN, NZ = 3, 2, 2
+ACTNUM = np.array([1, 1, 0, 1, 1, 1, 1, 1, 1, 1, 0, 1])
+
+
+@pytest.fixture
+def files(tmp_path):
+    """ .EGRID, .INIT and .UNRST files of a 3 by 2 by 2 grid of 100 by 50 by 10 ft
+        cells with two inactive cells
+    """
+    x, y = np.meshgrid(100. * np.arange(NE + 1), 50. * np.arange(NN + 1))
+    coord = np.stack((x, y, np.full(x.shape, 1000.), x, y, np.full(x.shape, 1100.)), axis=-1)
+    k, t = np.indices((NZ, 2, NN, 2, NE, 2))[0:2]
+    zcorn = 1000. + 10. * (k + t)
+    gridhead = np.zeros(100, dtype=np.int32)
+    gridhead[0:4] = 1, NE, NN, NZ
+    with open(tmp_path / "MODEL.EGRID", "wb") as fp:
+        writeRecord(fp, "FILEHEAD", np.zeros(100, dtype=np.int32))
+        writeRecord(fp, "GRIDHEAD", gridhead)
+        writeRecord(fp, "COORD", coord.ravel(), "REAL")
+        writeRecord(fp, "ZCORN", zcorn.ravel(), "REAL")
+        writeRecord(fp, "ACTNUM", ACTNUM)
+        writeRecord(fp, "ENDGRID", np.zeros(0, dtype=np.int32))
+    nactive = np.count_nonzero(ACTNUM)
+    with open(tmp_path / "MODEL.INIT", "wb") as fp:
+        writeRecord(fp, "INTEHEAD", np.zeros(95, dtype=np.int32))
+        # INIT arrays only hold the active cells
+        writeRecord(fp, "PORO", np.linspace(0.1, 0.2, nactive), "REAL")
+        writeRecord(fp, "PERMX", np.full(NE * NN * NZ, 250.), "REAL")
+    with open(tmp_path / "MODEL.UNRST", "wb") as fp:
+        for step in (0, 5):
+            writeRecord(fp, "SEQNUM", np.array([step], dtype=np.int32))
+            writeRecord(fp, "INTEHEAD", np.zeros(95, dtype=np.int32))
+            writeRecord(fp, "PRESSURE", np.full(nactive, 3000. + step), "REAL")
+            writeRecord(fp, "SWAT", np.full(nactive, 0.2), "REAL")
+    return tmp_path
+
+
+def load(files, **kwargs):
+    grid = EGRID()
+    grid.loadNodes(str(files / "MODEL.EGRID"), **kwargs)
+    return grid
+
+
+def test_load_nodes(files):
+    grid = load(files)
+    assert grid.GridType == "vtkStructuredGrid"
+    np.testing.assert_array_equal(grid.gridDimensions(), [NE + 1, NN + 1, NZ + 1])
+    points = np.reshape(grid.gridPoints(), (NZ + 1, NN + 1, NE + 1, 3))
+    np.testing.assert_array_equal(points[2, 1, 3], [300., 50., 1020.])
+    np.testing.assert_array_equal(np.ravel(grid.ActiveCells, order="F"), ACTNUM)
+
+
+def test_read_property(files):
+    grid = load(files)
+    poro = grid.readProperty(str(files / "MODEL.INIT"), "PORO")
+    expected = np.zeros(NE * NN * NZ)
+    expected[ACTNUM != 0] = np.linspace(0.1, 0.2, np.count_nonzero(ACTNUM))
+    np.testing.assert_allclose(np.ravel(grid.Prop["PORO"], order="F"), expected)
+    assert grid.Prop["PORO"] is poro
+    grid.readProperty(str(files / "MODEL.INIT"), "PermX", "PERMX")
+    np.testing.assert_array_equal(vtk_to_numpy(grid.Grid.GetCellData().GetArray("PermX")), 250.)
+    with pytest.raises(KeyError):
+        grid.readProperty(str(files / "MODEL.INIT"), "NTG")
+
+    grid.calculateVolumes()
+    np.testing.assert_allclose(grid.Volumes, 100. * 50. * 10. * f2m ** 3)
+    np.testing.assert_allclose(grid.PoreVolumes, grid.Volumes * grid.Prop["PORO"])
+
+
+def test_read_restart(files):
+    grid = load(files)
+    grid.readRestart(str(files / "MODEL.UNRST"), "PRESSURE", "P")
+    cells = grid.Grid.GetCellData()
+    for step in (0, 5):
+        pressure = vtk_to_numpy(cells.GetArray("P[%i]" % step))
+        np.testing.assert_array_equal(pressure[ACTNUM != 0], 3000. + step)
+        np.testing.assert_array_equal(pressure[ACTNUM == 0], 0.)
+    assert cells.GetArray("SWAT[0]") is None
+
+
+def test_active_only(files):
+    grid = load(files, activeOnly=True)
+    assert grid.Grid.GetNumberOfCells() == np.count_nonzero(ACTNUM)
+    grid.readProperty(str(files / "MODEL.INIT"), "PORO")
+    grid.readRestart(str(files / "MODEL.UNRST"), "PRESSURE")
+    np.testing.assert_allclose(grid.Prop["PORO"], np.linspace(0.1, 0.2, np.count_nonzero(ACTNUM)))
+    np.testing.assert_array_equal(vtk_to_numpy(grid.Grid.GetCellData().GetArray("PRESSURE[5]")), 3005.)
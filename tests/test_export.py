@@ -0,0 +1,72 @@
+import re
+
+import numpy as np
+import pytest
+import vtk
+
+from regrid.flowgrid.FlowGrid import FlowGrid, axesPoints
+
+# written by every exporter, exportAll runs some on threads
+FORMATS = ("vtk", "ecl", "eclprops", "eclbinary", "hdf5", "tough2")
+
+
+def activeGrid():
+    grid = FlowGrid()
+    grid.buildAxesGrid(np.arange(4.), np.arange(3.), np.arange(3.))
+    grid.ActiveCells = np.array([1, 0, 1, 1, 1, 0, 1, 1, 1, 1, 1, 1])
+    grid.keepActiveCells()
+    return grid
+
+
+@pytest.mark.parametrize("exporter", ["exportECL", "exportECLBinary", "exportECLPropertyFiles", "exportTOUGH2"])
+def test_structured_export_of_active_cells(tmp_path, exporter):
+    grid = activeGrid()
+    with pytest.raises(ValueError, match="structured grid is required"):
+        getattr(grid, exporter)(str(tmp_path / "grid"))
+    assert not list(tmp_path.iterdir())
+
+
+def test_export_all_reports_structured_exports(tmp_path):
+    grid = activeGrid()
+    results = grid.exportAll(str(tmp_path / "grid"), formats=("vtk", "ecl", "tough2"))
+    assert results["vtk"][1] is None
+    assert isinstance(results["ecl"][1], ValueError)
+    assert isinstance(results["tough2"][1], ValueError)
+    assert (tmp_path / "grid.vtu").exists()
+
+
+def structuredGrid():
+    grid = FlowGrid()
+    grid.GridType = "vtkStructuredGrid"
+    grid.Grid = vtk.vtkStructuredGrid()
+    grid.Grid.SetDimensions(6, 5, 4)
+    grid.Grid.SetPoints(grid.buildPoints(axesPoints(np.arange(6.), 2. * np.arange(5.), -np.arange(4.) ** 2)))
+    grid.addArray(np.linspace(0., 1., 60), "PORO")
+    grid.addArray(np.arange(60) % 7, "FIPNUM")
+    grid.addArray(grid.gridPoints()[:, 2].copy(), "Depth", point=True)
+    return grid
+
+
+def exported(path):
+    """ Contents of the exported files by extension, HDF5 stores hold creation
+        times and GRDECL files the export date, both are left out
+    """
+    files = {}
+    for f in sorted(path.iterdir()):
+        if f.suffix != ".h5":
+            files[f.name.split("-", 1)[-1]] = re.sub(rb"-- Date[^\n]*", b"", f.read_bytes())
+    return files
+
+
+def test_parallel_export_matches_serial(tmp_path):
+    grid = structuredGrid()
+    runs = []
+    for run, nthreads in enumerate((1, 1, None, None, None)):
+        path = tmp_path / str(run)
+        path.mkdir()
+        results = grid.exportAll(str(path / "grid"), formats=FORMATS, nthreads=nthreads)
+        assert all(error is None for seconds, error in results.values())
+        runs.append(exported(path))
+    assert len(runs[0]) == 8
+    for files in runs[1:]:
+        assert files == runs[0]
@@ -0,0 +1,84 @@
+import numpy as np
+import vtk
+from vtk.util.numpy_support import vtk_to_numpy
+
+from regrid.flowgrid.FlowGrid import EGRID, GRDECL, f2m
+
+TOP, BOTTOM = 1000., 1100.
+
+
+def writeGRDECL(fname, ne=4, nn=2, nz=2, slope=0., throw=0.):
+    """ Writes a corner point grid of 100 by 50 ft cells and 10 ft layers. Pillars
+        run from TOP to BOTTOM and lean slope ft east over that length, the cells
+        east of the middle pillar row are dropped by throw ft.
+    """
+    x, y = np.meshgrid(100. * np.arange(ne + 1), 50. * np.arange(nn + 1))
+    coord = np.stack((x, y, np.full(x.shape, TOP), x + slope, y, np.full(x.shape, BOTTOM)), axis=-1)
+    k, t, j, jy, i, ix = np.indices((nz, 2, nn, 2, ne, 2))
+    zcorn = TOP + 10. * (k + t) + np.where(i >= ne // 2, throw, 0.)
+    with open(fname, "w") as f:
+        f.write("SPECGRID\n  %i %i %i 1 F /\n\n" % (ne, nn, nz))
+        f.write("COORD\n" + " ".join("%.2f" % v for v in coord.ravel()) + " /\n\n")
+        f.write("ZCORN\n" + " ".join("%.2f" % v for v in zcorn.ravel()) + " /\n")
+    return coord.ravel(), zcorn.ravel()
+
+
+def load(fname):
+    grid = GRDECL()
+    grid.loadNodes(fname)
+    return grid
+
+
+def points(grid):
+    ne, nn, nz = grid.gridDimensions() - 1
+    return np.reshape(grid.gridPoints(), (nz + 1, nn + 1, ne + 1, 3))
+
+
+def vtkVolumes(grid):
+    quality = vtk.vtkMeshQuality()
+    quality.SetInputData(grid.Grid)
+    quality.SetHexQualityMeasureToVolume()
+    quality.Update()
+    return vtk_to_numpy(quality.GetOutput().GetCellData().GetArray("Quality")) * f2m ** 3
+
+
+def test_sloped_pillar_nodes(tmp_path):
+    fname = str(tmp_path / "sloped.GRDECL")
+    writeGRDECL(fname, slope=20.)
+    grid = load(fname)
+    p = points(grid)
+    # every node lies on its pillar, 20 ft east over the 100 ft pillar
+    np.testing.assert_allclose(p[..., 0], 100. * np.arange(5) + 20. * (p[..., 2] - TOP) / (BOTTOM - TOP))
+    np.testing.assert_allclose(p[-1, 0, 0], [4., 0., 1020.])
+    grid.calculateVolumes()
+    np.testing.assert_allclose(np.ravel(grid.Volumes, order="F"), vtkVolumes(grid))
+
+
+def test_sloped_round_trip(tmp_path):
+    fname = str(tmp_path / "sloped.GRDECL")
+    writeGRDECL(fname, slope=20.)
+    grid = load(fname)
+    grid.exportECL(str(tmp_path / "export"))
+    again = load(str(tmp_path / "export.GRDECL"))
+    np.testing.assert_allclose(again.gridPoints(), grid.gridPoints())
+    np.testing.assert_allclose(points(again)[-1, 0, 0], [4., 0., 1020.])
+    grid.calculateVolumes()
+    again.calculateVolumes()
+    np.testing.assert_allclose(again.Volumes, grid.Volumes)
+
+
+def test_faulted_round_trip(tmp_path):
+    fname = str(tmp_path / "faulted.GRDECL")
+    coord, zcorn = writeGRDECL(fname, slope=20., throw=15.)
+    grid = load(fname)
+    grid.exportECL(str(tmp_path / "export"))
+    grid.exportECLBinary(str(tmp_path / "export"))
+    again = load(str(tmp_path / "export.GRDECL"))
+    binary = EGRID()
+    binary.loadNodes(str(tmp_path / "export.EGRID"))
+    for other in (again, binary):
+        np.testing.assert_allclose(other.coords, coord)
+        np.testing.assert_allclose(other.zcorn, zcorn)
+        np.testing.assert_array_equal(other.CornerDepths, grid.CornerDepths)
+    # the cells on either side of the fault keep their own depths
+    np.testing.assert_array_equal(again.CornerDepths[1:3, 0, 0, 1:2], [[1000.], [1015.]])
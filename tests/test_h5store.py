@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+from vtk.util.numpy_support import vtk_to_numpy
+
+from regrid.flowgrid.FlowGrid import FlowGrid
+from regrid.flowgrid.h5store import GridStore, writeStore
+
+pytest.importorskip("h5py")
+
+
+def axesGrid():
+    grid = FlowGrid()
+    grid.buildAxesGrid(np.arange(4.), np.array([0., 1., 3.]), np.array([0., -2., -5.]))
+    grid.ActiveCells = np.array([1, 0, 1, 1, 1, 0, 1, 1, 1, 1, 1, 1])
+    grid.addArray(grid.ActiveCells, "ActiveCells")
+    grid.addArray(np.linspace(0., 1., 12), "PORO")
+    grid.addArray(np.arange(36.), "Elevation", point=True)
+    for time in ("0.0", "10.0"):
+        grid.addArray(np.full(12, float(time)), "Pressure[%s]" % time)
+    return grid
+
+
+def cellArray(grid, name):
+    return vtk_to_numpy(grid.Grid.GetCellData().GetArray(name))
+
+
+def test_store_round_trip(tmp_path):
+    fname = str(tmp_path / "grid.h5")
+    arrays = axesGrid().gridArrays()
+    writeStore(fname, arrays)
+    with GridStore(fname) as store:
+        assert store.GridType == "vtkRectilinearGrid"
+        assert sorted(store.properties) == ["ActiveCells", "Elevation", "PORO"]
+        assert store.timeseries == {"Pressure": ["0.0", "10.0"]}
+        geometry = store.geometry()
+        for name in ("Dimensions", "XCoordinates", "YCoordinates", "ZCoordinates"):
+            np.testing.assert_array_equal(geometry[name], arrays[name])
+        np.testing.assert_array_equal(store.read("PORO"), arrays["cell:PORO"])
+        np.testing.assert_array_equal(store.read("Pressure[10.0]"), 10.)
+        assert store.isPoint("Elevation") and not store.isPoint("Pressure[0.0]")
+        assert "PORO" in store.loaded
+        store.release("PORO")
+        assert "PORO" not in store.loaded
+        with pytest.raises(KeyError):
+            store.read("PERMX")
+
+
+def test_grid_round_trip(tmp_path):
+    fname = str(tmp_path / "grid.h5")
+    grid = axesGrid()
+    grid.exportHDF5(fname)
+    loaded = FlowGrid()
+    loaded.loadHDF5(fname)
+    assert loaded.GridType == grid.GridType
+    np.testing.assert_array_equal(loaded.gridPoints(), grid.gridPoints())
+    np.testing.assert_array_equal(np.ravel(loaded.ActiveCells, order="F"), grid.ActiveCells)
+    # properties stay on disk until asked for
+    assert loaded.Grid.GetCellData().GetArray("PORO") is None
+    loaded.loadStored(["PORO", "Pressure[0.0]"])
+    np.testing.assert_array_equal(cellArray(loaded, "PORO"), cellArray(grid, "PORO"))
+    np.testing.assert_array_equal(cellArray(loaded, "Pressure[0.0]"), 0.)
+
+
+def test_active_cells_round_trip(tmp_path):
+    fname = str(tmp_path / "active.h5")
+    grid = axesGrid()
+    grid.keepActiveCells()
+    grid.exportHDF5(fname)
+    loaded = FlowGrid()
+    loaded.loadHDF5(fname)
+    assert loaded.GridType == "vtkUnstructuredGrid"
+    assert loaded.Grid.GetNumberOfCells() == 10
+    np.testing.assert_array_equal(loaded.GlobalIndex, grid.GlobalIndex)
+    np.testing.assert_array_equal(loaded.ActiveIndex, grid.ActiveIndex)
+    np.testing.assert_array_equal(loaded.gridPoints(), grid.gridPoints())
+    loaded.loadStored("PORO")
+    np.testing.assert_array_equal(cellArray(loaded, "PORO"), cellArray(grid, "PORO"))
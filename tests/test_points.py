@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from vtk.util.numpy_support import vtk_to_numpy
+
+from regrid.flowgrid.FlowGrid import FlowGrid, axesPoints, castValues
+
+
+def test_axes_points():
+    points = axesPoints(np.array([0., 1.]), np.array([5., 6., 7.]), np.array([-1., -2.]))
+    assert points.shape == (2, 3, 2, 3)
+    # x runs fastest, then y, then z
+    np.testing.assert_array_equal(points.reshape(-1, 3)[:3], [[0., 5., -1.], [1., 5., -1.], [0., 6., -1.]])
+
+
+def test_points_shared_with_vtk():
+    grid = FlowGrid()
+    points = np.arange(12.).reshape(4, 3)
+    vtk_points = grid.buildPoints(points)
+    data = vtk_to_numpy(vtk_points.GetData())
+    np.testing.assert_array_equal(data, points)
+    assert np.shares_memory(data, points)
+
+
+def test_points_converted_once():
+    grid = FlowGrid()
+    points = np.arange(12).reshape(4, 3)
+    data = vtk_to_numpy(grid.buildPoints(points).GetData())
+    assert data.dtype == np.float64
+    np.testing.assert_array_equal(data, points)
+
+
+def test_axes_grid_points():
+    grid = FlowGrid()
+    X, Y, Z = np.arange(3.), np.array([0., 2., 5.]), np.array([10., 8.])
+    grid.buildAxesGrid(X, Y, Z)
+    assert grid.GridType == "vtkRectilinearGrid"
+    np.testing.assert_array_equal(grid.gridPoints(), axesPoints(X, Y, Z).reshape(-1, 3))
+    grid.buildAxesGrid(X, X, Z)
+    assert grid.GridType == "vtkImageData"
+    np.testing.assert_allclose(grid.gridPoints(), axesPoints(X, X, Z).reshape(-1, 3))
+
+
+def test_float32_points_relative_to_origin():
+    grid = FlowGrid()
+    grid.setPrecision(points=np.float32)
+    points = np.array([[612345.25, 7012345.5, 1500.], [612346.5, 7012347.75, 1510.25]])
+    grid.buildPoints(points)
+    np.testing.assert_array_equal(grid.Origin, [612345., 7012345., 1500.])
+    data = vtk_to_numpy(grid.buildPoints(points).GetData())
+    assert data.dtype == np.float32
+    np.testing.assert_array_equal(data + grid.Origin, points)
+
+
+def test_cast_values():
+    data = castValues(np.array([1., 0., 1.]), np.uint8, 3)
+    assert data.dtype == np.uint8
+    np.testing.assert_array_equal(data, [1, 0, 1])
+    with pytest.raises(ValueError):
+        castValues(np.ones(4), float, 3)
@@ -0,0 +1,77 @@
+import numpy as np
+
+from regrid.flowgrid.FlowGrid import GRDECL
+from regrid.flowgrid.rectilinear import layerAxis, pillarAxes, rectilinearAxes
+
+
+def cornerPoint(X, Y, Z):
+    """ COORD and ZCORN of the rectilinear grid spanned by the axes """
+    ne, nn, nz = len(X) - 1, len(Y) - 1, len(Z) - 1
+    x, y = np.meshgrid(X, Y)
+    coord = np.stack((x, y, np.full(x.shape, Z[0]), x, y, np.full(x.shape, Z[-1])), axis=-1).ravel()
+    k, t = np.indices((nz, 2, nn, 2, ne, 2))[0:2]
+    zcorn = np.asarray(Z)[k + t].ravel()
+    return coord, zcorn
+
+
+X, Y, Z = np.array([0., 100., 250.]), np.array([0., 50., 100., 200.]), np.array([1000., 1010., 1030.])
+
+
+def test_axes():
+    coord, zcorn = cornerPoint(X, Y, Z)
+    axes = rectilinearAxes(coord, zcorn, 2, 3, 2)
+    for axis, expected in zip(axes, (X, Y, Z)):
+        np.testing.assert_array_equal(axis, expected)
+
+
+def test_within_tolerance():
+    coord, zcorn = cornerPoint(X, Y, Z)
+    zcorn[5] += 1e-6
+    coord[0] += 1e-5
+    assert rectilinearAxes(coord, zcorn, 2, 3, 2) is not None
+    assert rectilinearAxes(coord, zcorn, 2, 3, 2, tolerance=1e-9) is None
+
+
+def test_sloped_pillars():
+    coord, zcorn = cornerPoint(X, Y, Z)
+    coord = coord.reshape(-1, 6)
+    coord[:, 3] += 5.
+    assert pillarAxes(coord.ravel(), 2, 3) is None
+
+
+def test_dipping_layer():
+    coord, zcorn = cornerPoint(X, Y, Z)
+    zcorn = zcorn.reshape(2, 2, 3, 2, 2, 2)
+    zcorn[1, 1, :, :, 1] += 2.
+    assert layerAxis(zcorn.ravel(), 2, 3, 2) is None
+    assert rectilinearAxes(coord, zcorn.ravel(), 2, 3, 2) is None
+
+
+def test_gap_between_layers():
+    coord, zcorn = cornerPoint(X, Y, Z)
+    zcorn = zcorn.reshape(2, 2, 3, 2, 2, 2)
+    zcorn[1, 0] += 1.
+    assert layerAxis(zcorn.ravel(), 2, 3, 2) is None
+
+
+def test_missing_depths():
+    coord, zcorn = cornerPoint(X, Y, Z)
+    zcorn[0] = np.nan
+    assert layerAxis(zcorn, 2, 3, 2) is None
+
+
+def test_loader_opt_in(tmp_path):
+    coord, zcorn = cornerPoint(X, Y, Z)
+    fname = str(tmp_path / "grid.GRDECL")
+    with open(fname, "w") as f:
+        f.write("SPECGRID\n  2 3 2 1 F /\n\n")
+        f.write("COORD\n" + " ".join("%.1f" % v for v in coord) + " /\n\n")
+        f.write("ZCORN\n" + " ".join("%.1f" % v for v in zcorn) + " /\n")
+    grid = GRDECL()
+    grid.loadNodes(fname)
+    assert grid.GridType == "vtkStructuredGrid"
+    axes = GRDECL()
+    axes.loadNodes(fname, rectilinear=True)
+    assert axes.GridType == "vtkRectilinearGrid"
+    assert axes.zcorn is None
+    np.testing.assert_allclose(axes.gridPoints(), grid.gridPoints())
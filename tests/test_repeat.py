@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from regrid.flowgrid.repeat import compressRepeats, parseRepeats, roundSignificant
+
+
+def test_round_trip():
+    values = np.array([0, 0, 0, 1, 1, 0, 2, 2, 2, 2, 3])
+    counts, runs = compressRepeats(values)
+    np.testing.assert_array_equal(counts, [3, 2, 1, 4, 1])
+    np.testing.assert_array_equal(runs, [0, 1, 0, 2, 3])
+    tokens = ["%i*%i" % (c, r) if c > 1 else "%i" % r for c, r in zip(counts, runs)]
+    np.testing.assert_array_equal(parseRepeats(" ".join(tokens).encode(), dtype=int), values)
+
+
+def test_compress_empty():
+    counts, runs = compressRepeats(np.zeros(0))
+    assert len(counts) == 0 and len(runs) == 0
+
+
+def test_parse():
+    block = b"  1.5 3*0.25\n\t2*-4 1e3  \n"
+    np.testing.assert_array_equal(parseRepeats(block), [1.5, .25, .25, .25, -4., -4., 1000.])
+    np.testing.assert_array_equal(parseRepeats(b"2*7 1", dtype=int), [7, 7, 1])
+    assert len(parseRepeats(b"   ")) == 0
+
+
+def test_parse_malformed():
+    with pytest.raises(ValueError):
+        parseRepeats(b"1 2* 3")
+
+
+def test_round_significant():
+    np.testing.assert_allclose(roundSignificant([1234.5, 0.012345, 0.], 3), [1230., 0.0123, 0.])
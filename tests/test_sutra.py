@@ -0,0 +1,79 @@
+import numpy as np
+
+from regrid.flowgrid.FlowGrid import SUTRA
+from regrid.flowgrid.cache import GridCache
+
+NX, NY, NZ = 3, 2, 2
+
+
+def lattice():
+    """ Nodes in the SUTRA order, z fastest then y and x
+    """
+    i, j, k = np.meshgrid(np.arange(NX), np.arange(NY), np.arange(NZ), indexing="ij")
+    return np.column_stack((10. * i.ravel(), 20. * j.ravel(), 5. * k.ravel()))
+
+
+def writeNodes(fname):
+    n = NX * NY * NZ
+    np.savetxt(fname, np.column_stack((np.arange(n) + 1, np.zeros(n), lattice())), header="nodewise")
+
+
+def writeIncident(fname):
+    node = lambda i, j, k: i * NY * NZ + j * NZ + k + 1
+    elements = []
+    for i in range(NX - 1):
+        for j in range(NY - 1):
+            elements.append([len(elements) + 1, node(i, j, 0), node(i + 1, j, 0), node(i + 1, j + 1, 0),
+                             node(i, j + 1, 0), node(i, j, 1), node(i + 1, j, 1), node(i + 1, j + 1, 1),
+                             node(i, j + 1, 1)])
+    with open(fname, "w") as fp:
+        fp.write("## incident\n## elements\n")
+        np.savetxt(fp, elements, fmt="%d")
+    return np.array(elements)
+
+
+def test_nodes(tmp_path):
+    writeNodes(str(tmp_path / "nodewise"))
+    grid = SUTRA()
+    grid.loadNodes(str(tmp_path / "nodewise"), NX, NY, NZ)
+    assert grid.GridType == "vtkStructuredGrid"
+    np.testing.assert_array_equal(grid.gridDimensions(), [NX, NY, NZ])
+    # VTK runs through x first, z is flipped by the default exaggeration of -1
+    points = np.reshape(grid.gridPoints(), (NZ, NY, NX, 3))
+    np.testing.assert_array_equal(points[1, 0, 2], [20., 0., -5.])
+    np.testing.assert_array_equal(points[0, 1, 1], [10., 20., 0.])
+
+
+def test_nodes_exaggeration(tmp_path):
+    writeNodes(str(tmp_path / "nodewise"))
+    grid = SUTRA()
+    grid.loadNodes(str(tmp_path / "nodewise"), NX, NY, NZ, ve=2)
+    np.testing.assert_array_equal(np.reshape(grid.gridPoints(), (NZ, NY, NX, 3))[1, 1, 2], [20., 20., 10.])
+
+
+def test_nodes_connections(tmp_path):
+    writeNodes(str(tmp_path / "nodewise"))
+    elements = writeIncident(str(tmp_path / "incident"))
+    grid = SUTRA()
+    grid.loadNodesConnections(str(tmp_path / "nodewise"), str(tmp_path / "incident"))
+    assert grid.GridType == "vtkUnstructuredGrid"
+    np.testing.assert_array_equal(grid.gridPoints(), lattice())
+    assert grid.Grid.GetNumberOfCells() == len(elements)
+    for c, element in enumerate(elements):
+        cell = grid.Grid.GetCell(c)
+        assert cell.GetCellType() == 12  # VTK_HEXAHEDRON
+        ids = [cell.GetPointId(p) for p in range(cell.GetNumberOfPoints())]
+        np.testing.assert_array_equal(ids, element[1:] - 1)
+
+
+def test_cached_nodes_connections(tmp_path):
+    writeNodes(str(tmp_path / "nodewise"))
+    writeIncident(str(tmp_path / "incident"))
+    grids = []
+    for i in range(2):
+        grid = SUTRA()
+        grid.cache = GridCache(str(tmp_path / "cache"))
+        grid.loadNodesConnections(str(tmp_path / "nodewise"), str(tmp_path / "incident"))
+        grids.append(grid)
+    np.testing.assert_array_equal(grids[1].gridPoints(), grids[0].gridPoints())
+    assert grids[1].Grid.GetNumberOfCells() == grids[0].Grid.GetNumberOfCells()
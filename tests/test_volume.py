@@ -0,0 +1,65 @@
+import numpy as np
+
+from regrid.flowgrid.volume import cellVolumes, hexahedronVolumes
+
+
+def boxCorners(dx, dy, heights, x0=0., y0=0., z0=0.):
+    """ (8,) corner coordinates of a cell with vertical edges on a dx by dy base,
+        heights = height of the edge at each of the SW, SE, NW, NE corners
+    """
+    corner = np.arange(8)
+    X = x0 + dx * (corner & 1)
+    Y = y0 + dy * ((corner >> 1) & 1)
+    Z = z0 + np.where(corner >= 4, np.tile(heights, 2), 0.)
+    return X.astype(float), Y.astype(float), Z
+
+
+def pillars(X, Y, top, bottom, shift=0.):
+    """ COORD of vertical pillars, or pillars shifted in x over their length """
+    x, y = np.meshgrid(X, Y)
+    return np.stack((x, y, np.full(x.shape, top), x + shift, y, np.full(x.shape, bottom)), axis=-1).ravel()
+
+
+def test_box():
+    X, Y, Z = boxCorners(2., 3., [4., 4., 4., 4.])
+    np.testing.assert_allclose(hexahedronVolumes(X, Y, Z), 24.)
+
+
+def test_far_from_origin():
+    X, Y, Z = boxCorners(2., 3., [4., 4., 4., 4.], x0=5e5, y0=7e6, z0=2500.)
+    np.testing.assert_allclose(hexahedronVolumes(X, Y, Z), 24., rtol=1e-12)
+
+
+def test_non_planar_top():
+    # the volume under a bilinear surface is the mean height times the base
+    X, Y, Z = boxCorners(1., 1., [1., 2., 3., 6.])
+    np.testing.assert_allclose(hexahedronVolumes(X, Y, Z), 3.)
+
+
+def test_parallelepiped():
+    X, Y, Z = boxCorners(2., 3., [4., 4., 4., 4.])
+    X = X + 1.5 * Z / 4.
+    np.testing.assert_allclose(hexahedronVolumes(X, Y, Z), 24.)
+
+
+def test_batched():
+    heights = np.array([[1., 1., 1., 1.], [1., 2., 3., 6.], [2., 2., 2., 2.]])
+    corners = [boxCorners(1., 1., h) for h in heights]
+    X, Y, Z = (np.stack([c[i] for c in corners], axis=-1) for i in range(3))
+    np.testing.assert_allclose(hexahedronVolumes(X, Y, Z), [1., 3., 2.])
+
+
+def test_cell_volumes():
+    ne, nn, nz = 3, 2, 2
+    coords = pillars(10. * np.arange(ne + 1), 20. * np.arange(nn + 1), 1000., 1100., shift=5.)
+    depths = np.empty((ne, nn, nz, 8))
+    depths[..., :4] = 1000. + 10. * np.arange(nz)[:, None]
+    depths[..., 4:] = 1010. + 10. * np.arange(nz)[:, None]
+    depths[0, 0, 1] = np.nan
+    depths[1, 0, 0, 4:] = 1000.
+    volumes, valid = cellVolumes(coords, depths, chunksize=ne * nn)
+    expected = np.full((ne, nn, nz), 2000.)
+    expected[0, 0, 1] = expected[1, 0, 0] = 0.
+    np.testing.assert_allclose(volumes, expected)
+    np.testing.assert_array_equal(valid, expected > 0)
+    np.testing.assert_allclose(cellVolumes(coords, depths, scale=0.5)[0], expected / 8.)